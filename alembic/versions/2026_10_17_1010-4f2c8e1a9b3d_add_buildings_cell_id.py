@@ -0,0 +1,48 @@
+"""add_buildings_cell_id
+
+Revision ID: 4f2c8e1a9b3d
+Revises: 6b124f3555be
+Create Date: 2026-10-17 10:10:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2c8e1a9b3d"
+down_revision: Union[str, None] = "6b124f3555be"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Z-order code of 16-bit quantized coordinates, same as app.common.geocell.encode_cell
+BACKFILL_CELL_ID = """
+UPDATE buildings
+SET cell_id = (
+    SELECT sum((((q.x >> i) & 1) << (2 * i)) | (((q.y >> i) & 1) << (2 * i + 1)))
+    FROM (
+        SELECT
+            least(greatest(floor((buildings.longitude + 180) / 360 * 65536), 0), 65535)::bigint AS x,
+            least(greatest(floor((buildings.latitude + 90) / 180 * 65536), 0), 65535)::bigint AS y
+    ) AS q,
+    generate_series(0, 15) AS i
+)
+"""
+
+
+def upgrade() -> None:
+    op.add_column("buildings", sa.Column("cell_id", sa.BigInteger(), nullable=True))
+    op.execute(BACKFILL_CELL_ID)
+    op.alter_column("buildings", "cell_id", nullable=False)
+    op.create_index(
+        op.f("ix_buildings_cell_id"), "buildings", ["cell_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_buildings_cell_id"), table_name="buildings")
+    op.drop_column("buildings", "cell_id")
@@ -0,0 +1,74 @@
+"""create_activity_closure
+
+Revision ID: 9d81b7c4e2a6
+Revises: 4f2c8e1a9b3d
+Create Date: 2026-10-17 11:20:37.905112
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d81b7c4e2a6"
+down_revision: Union[str, None] = "4f2c8e1a9b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_CLOSURE = """
+INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM activities
+    UNION ALL
+    SELECT tree.ancestor_id, activities.id, tree.depth + 1
+    FROM tree
+    JOIN activities ON activities.parent_id = tree.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["ancestor_id"],
+            ["activities.id"],
+            name=op.f("fk_activity_closure_ancestor_id_activities"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["descendant_id"],
+            ["activities.id"],
+            name=op.f("fk_activity_closure_descendant_id_activities"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "ancestor_id", "descendant_id", name=op.f("pk_activity_closure")
+        ),
+    )
+    op.create_index(
+        op.f("ix_activity_closure_descendant_id"),
+        "activity_closure",
+        ["descendant_id"],
+        unique=False,
+    )
+    op.execute(BACKFILL_CLOSURE)
+    op.drop_constraint(op.f("ck_activities_level_check"), "activities", type_="check")
+
+
+def downgrade() -> None:
+    op.create_check_constraint(
+        op.f("ck_activities_level_check"), "activities", "level <=3"
+    )
+    op.drop_index(
+        op.f("ix_activity_closure_descendant_id"), table_name="activity_closure"
+    )
+    op.drop_table("activity_closure")
@@ -0,0 +1,69 @@
+"""create_data_versions
+
+Revision ID: c3a7d5f90e18
+Revises: 9d81b7c4e2a6
+Create Date: 2026-10-17 12:15:03.271644
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a7d5f90e18"
+down_revision: Union[str, None] = "9d81b7c4e2a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = (
+    "activities",
+    "buildings",
+    "organizations",
+    "organization_activity_rel",
+)
+
+CREATE_BUMP_FUNCTION = """
+CREATE FUNCTION bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_versions
+    SET version = version + 1, updated_at = now()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_versions",
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("table_name", name=op.f("pk_data_versions")),
+    )
+    op.execute(CREATE_BUMP_FUNCTION)
+
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"INSERT INTO data_versions (table_name) VALUES ('{table_name}')")
+        op.execute(
+            f"CREATE TRIGGER trg_{table_name}_data_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()"
+        )
+
+
+def downgrade() -> None:
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER trg_{table_name}_data_version ON {table_name}")
+    op.execute("DROP FUNCTION bump_data_version()")
+    op.drop_table("data_versions")
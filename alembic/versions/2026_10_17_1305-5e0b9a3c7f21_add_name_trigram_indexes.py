@@ -0,0 +1,44 @@
+"""add_name_trigram_indexes
+
+Revision ID: 5e0b9a3c7f21
+Revises: c3a7d5f90e18
+Create Date: 2026-10-17 13:05:48.603917
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0b9a3c7f21"
+down_revision: Union[str, None] = "c3a7d5f90e18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_organizations_name_trgm",
+        "organizations",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_activities_name_trgm",
+        "activities",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activities_name_trgm", table_name="activities")
+    op.drop_index("ix_organizations_name_trgm", table_name="organizations")
@@ -0,0 +1,123 @@
+"""add_organizations_search_vector
+
+Revision ID: a86e2f4d1c07
+Revises: 5e0b9a3c7f21
+Create Date: 2026-10-17 13:40:21.554178
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a86e2f4d1c07"
+down_revision: Union[str, None] = "5e0b9a3c7f21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# organization name (weight A) and names of its activities (weight B)
+CREATE_VECTOR_FUNCTION = """
+CREATE FUNCTION organization_search_vector(org_name text, org_id integer)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('russian', org_name), 'A')
+        || setweight(to_tsvector('russian', coalesce(string_agg(a.name, ' '), '')), 'B')
+    FROM organization_activity_rel r
+    JOIN activities a ON a.id = r.activity_id
+    WHERE r.organization_id = org_id
+$$ LANGUAGE sql STABLE
+"""
+
+CREATE_TRIGGER_FUNCTIONS = [
+    """
+    CREATE FUNCTION organizations_search_vector_trg() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := organization_search_vector(NEW.name, NEW.id);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION organization_activity_rel_search_vector_trg() RETURNS trigger AS $$
+    DECLARE
+        org_id integer := CASE WHEN TG_OP = 'DELETE' THEN OLD.organization_id
+                               ELSE NEW.organization_id END;
+    BEGIN
+        UPDATE organizations
+        SET search_vector = organization_search_vector(name, id)
+        WHERE id = org_id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION activities_search_vector_trg() RETURNS trigger AS $$
+    BEGIN
+        UPDATE organizations
+        SET search_vector = organization_search_vector(name, id)
+        WHERE id IN (
+            SELECT organization_id FROM organization_activity_rel
+            WHERE activity_id = NEW.id
+        );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+CREATE_TRIGGERS = [
+    """
+    CREATE TRIGGER trg_organizations_search_vector
+    BEFORE INSERT OR UPDATE OF name ON organizations
+    FOR EACH ROW EXECUTE FUNCTION organizations_search_vector_trg()
+    """,
+    """
+    CREATE TRIGGER trg_organization_activity_rel_search_vector
+    AFTER INSERT OR UPDATE OR DELETE ON organization_activity_rel
+    FOR EACH ROW EXECUTE FUNCTION organization_activity_rel_search_vector_trg()
+    """,
+    """
+    CREATE TRIGGER trg_activities_search_vector
+    AFTER UPDATE OF name ON activities
+    FOR EACH ROW EXECUTE FUNCTION activities_search_vector_trg()
+    """,
+]
+
+
+def upgrade() -> None:
+    op.add_column(
+        "organizations",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute(CREATE_VECTOR_FUNCTION)
+    for statement in CREATE_TRIGGER_FUNCTIONS + CREATE_TRIGGERS:
+        op.execute(statement)
+
+    op.execute(
+        "UPDATE organizations SET search_vector = organization_search_vector(name, id)"
+    )
+    op.create_index(
+        "ix_organizations_search_vector",
+        "organizations",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_organizations_search_vector", table_name="organizations")
+    op.execute("DROP TRIGGER trg_activities_search_vector ON activities")
+    op.execute(
+        "DROP TRIGGER trg_organization_activity_rel_search_vector "
+        "ON organization_activity_rel"
+    )
+    op.execute("DROP TRIGGER trg_organizations_search_vector ON organizations")
+    op.execute("DROP FUNCTION activities_search_vector_trg()")
+    op.execute("DROP FUNCTION organization_activity_rel_search_vector_trg()")
+    op.execute("DROP FUNCTION organizations_search_vector_trg()")
+    op.execute("DROP FUNCTION organization_search_vector(text, integer)")
+    op.drop_column("organizations", "search_vector")
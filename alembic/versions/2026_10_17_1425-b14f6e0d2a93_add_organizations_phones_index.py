@@ -0,0 +1,32 @@
+"""add_organizations_phones_index
+
+Revision ID: b14f6e0d2a93
+Revises: a86e2f4d1c07
+Create Date: 2026-10-17 14:25:07.318245
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b14f6e0d2a93"
+down_revision: Union[str, None] = "a86e2f4d1c07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_organizations_phones",
+        "organizations",
+        ["phones"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_organizations_phones", table_name="organizations")
@@ -0,0 +1,70 @@
+"""add_row_versions
+
+Revision ID: e7c29b4a6d15
+Revises: b14f6e0d2a93
+Create Date: 2026-10-17 15:10:44.906127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7c29b4a6d15"
+down_revision: Union[str, None] = "b14f6e0d2a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = (
+    "activities",
+    "buildings",
+    "organizations",
+)
+
+CREATE_BUMP_FUNCTION = """
+CREATE FUNCTION bump_row_version() RETURNS trigger AS $$
+BEGIN
+    IF NEW IS DISTINCT FROM OLD THEN
+        NEW.version := OLD.version + 1;
+        NEW.updated_at := now();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute(CREATE_BUMP_FUNCTION)
+
+    for table_name in VERSIONED_TABLES:
+        op.add_column(
+            table_name,
+            sa.Column("version", sa.BigInteger(), server_default="1", nullable=False),
+        )
+        op.add_column(
+            table_name,
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=False,
+            ),
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_{table_name}_row_version "
+            f"BEFORE UPDATE ON {table_name} "
+            f"FOR EACH ROW EXECUTE FUNCTION bump_row_version()"
+        )
+
+
+def downgrade() -> None:
+    for table_name in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER trg_{table_name}_row_version ON {table_name}")
+        op.drop_column(table_name, "updated_at")
+        op.drop_column(table_name, "version")
+    op.execute("DROP FUNCTION bump_row_version()")
@@ -0,0 +1,44 @@
+"""add_foreign_key_indexes
+
+Revision ID: c52d7a9e3f18
+Revises: e7c29b4a6d15
+Create Date: 2026-10-17 16:00:21.573904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c52d7a9e3f18"
+down_revision: Union[str, None] = "e7c29b4a6d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # organizations of a building and building id IN-lists of the geo filters
+    op.create_index(
+        op.f("ix_organizations_building_id"),
+        "organizations",
+        ["building_id"],
+        unique=False,
+    )
+    # the primary key (organization_id, activity_id) does not serve
+    # lookups by activity, e.g. the activity subtree join
+    op.create_index(
+        op.f("ix_organization_activity_rel_activity_id"),
+        "organization_activity_rel",
+        ["activity_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_organization_activity_rel_activity_id"),
+        table_name="organization_activity_rel",
+    )
+    op.drop_index(op.f("ix_organizations_building_id"), table_name="organizations")
@@ -0,0 +1,66 @@
+"""add_buildings_cell_id_trigger
+
+Revision ID: d4e8b1f27a90
+Revises: c52d7a9e3f18
+Create Date: 2026-10-17 16:30:48.205517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e8b1f27a90"
+down_revision: Union[str, None] = "c52d7a9e3f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Z-order code of 16-bit quantized coordinates, same as app.common.geocell.encode_cell
+CREATE_CELL_ID_FUNCTION = """
+CREATE FUNCTION building_cell_id(lat double precision, lng double precision)
+RETURNS bigint AS $$
+    SELECT sum((((q.x >> i) & 1) << (2 * i)) | (((q.y >> i) & 1) << (2 * i + 1)))::bigint
+    FROM (
+        SELECT
+            least(greatest(floor((lng + 180) / 360 * 65536), 0), 65535)::bigint AS x,
+            least(greatest(floor((lat + 90) / 180 * 65536), 0), 65535)::bigint AS y
+    ) AS q,
+    generate_series(0, 15) AS i
+$$ LANGUAGE sql IMMUTABLE
+"""
+
+CREATE_TRIGGER_FUNCTION = """
+CREATE FUNCTION buildings_cell_id_trg() RETURNS trigger AS $$
+BEGIN
+    NEW.cell_id := building_cell_id(NEW.latitude, NEW.longitude);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# any insert or coordinate update, ORM, Core or raw SQL, keeps cell_id in sync
+CREATE_TRIGGER = """
+CREATE TRIGGER trg_buildings_cell_id
+BEFORE INSERT OR UPDATE OF latitude, longitude, cell_id ON buildings
+FOR EACH ROW EXECUTE FUNCTION buildings_cell_id_trg()
+"""
+
+
+def upgrade() -> None:
+    op.execute(CREATE_CELL_ID_FUNCTION)
+    op.execute(CREATE_TRIGGER_FUNCTION)
+    op.execute(CREATE_TRIGGER)
+    # rows written by Core statements before the trigger existed
+    op.execute(
+        "UPDATE buildings SET cell_id = building_cell_id(latitude, longitude) "
+        "WHERE cell_id IS DISTINCT FROM building_cell_id(latitude, longitude)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER trg_buildings_cell_id ON buildings")
+    op.execute("DROP FUNCTION buildings_cell_id_trg()")
+    op.execute("DROP FUNCTION building_cell_id(double precision, double precision)")
@@ -0,0 +1,129 @@
+"""add_activity_closure_triggers
+
+Revision ID: f3a61c8d0b24
+Revises: d4e8b1f27a90
+Create Date: 2026-10-17 16:50:14.662031
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a61c8d0b24"
+down_revision: Union[str, None] = "d4e8b1f27a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CREATE_INSERT_FUNCTION = """
+CREATE FUNCTION activity_closure_insert_trg() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+    VALUES (NEW.id, NEW.id, 0);
+
+    IF NEW.parent_id IS NOT NULL THEN
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, NEW.id, depth + 1
+        FROM activity_closure
+        WHERE descendant_id = NEW.parent_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_CHECK_FUNCTION = """
+CREATE FUNCTION activity_closure_check_trg() RETURNS trigger AS $$
+BEGIN
+    -- (id, id, 0) is in the closure, so this also rejects parent_id = id
+    IF NEW.parent_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM activity_closure
+        WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+    ) THEN
+        RAISE EXCEPTION 'activity % cannot be moved under its own subtree (%)',
+            NEW.id, NEW.parent_id
+            USING ERRCODE = 'check_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+CREATE_MOVE_FUNCTION = """
+CREATE FUNCTION activity_closure_move_trg() RETURNS trigger AS $$
+BEGIN
+    -- detach the subtree from its former ancestors
+    DELETE FROM activity_closure
+    WHERE descendant_id IN (
+            SELECT descendant_id FROM activity_closure WHERE ancestor_id = NEW.id
+        )
+        AND ancestor_id NOT IN (
+            SELECT descendant_id FROM activity_closure WHERE ancestor_id = NEW.id
+        );
+
+    -- attach it under every ancestor of the new parent
+    IF NEW.parent_id IS NOT NULL THEN
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestors.ancestor_id,
+               descendants.descendant_id,
+               ancestors.depth + descendants.depth + 1
+        FROM activity_closure AS ancestors
+        CROSS JOIN activity_closure AS descendants
+        WHERE ancestors.descendant_id = NEW.parent_id
+            AND descendants.ancestor_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# ORM, Core and raw SQL writes all keep the closure consistent
+CREATE_TRIGGERS = (
+    """
+    CREATE TRIGGER trg_activities_closure_insert
+    AFTER INSERT ON activities
+    FOR EACH ROW EXECUTE FUNCTION activity_closure_insert_trg()
+    """,
+    """
+    CREATE TRIGGER trg_activities_closure_check
+    BEFORE UPDATE OF parent_id ON activities
+    FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+    EXECUTE FUNCTION activity_closure_check_trg()
+    """,
+    """
+    CREATE TRIGGER trg_activities_closure_move
+    AFTER UPDATE OF parent_id ON activities
+    FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+    EXECUTE FUNCTION activity_closure_move_trg()
+    """,
+)
+
+TRIGGERS = (
+    "trg_activities_closure_insert",
+    "trg_activities_closure_check",
+    "trg_activities_closure_move",
+)
+
+FUNCTIONS = (
+    "activity_closure_insert_trg",
+    "activity_closure_check_trg",
+    "activity_closure_move_trg",
+)
+
+
+def upgrade() -> None:
+    op.execute(CREATE_INSERT_FUNCTION)
+    op.execute(CREATE_CHECK_FUNCTION)
+    op.execute(CREATE_MOVE_FUNCTION)
+    for statement in CREATE_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER {trigger} ON activities")
+    for function in FUNCTIONS:
+        op.execute(f"DROP FUNCTION {function}()")
@@ -0,0 +1,33 @@
+from typing import Annotated
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.common.conditional import check_not_modified
+from app.common.fieldsets import FieldSet
+from app.models import db_helper
+from app.api_v1.fieldsets import organization_fieldset
+
+
+async def table_not_modified(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+) -> None:
+    query = sorted(request.query_params.multi_items())
+    validators = await crud.get_table_validators(db, f"{request.url.path}?{query}")
+    check_not_modified(request, validators)
+
+
+async def organization_not_modified(
+    organization_id: int,
+    request: Request,
+    fieldset: Annotated[FieldSet | None, Depends(organization_fieldset)],
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+) -> None:
+    # sparse fieldsets are other representations of the same rows
+    representation = "full" if fieldset is None else fieldset.key
+    validators = await crud.get_organization_validators(
+        db, organization_id, representation
+    )
+    check_not_modified(request, validators)
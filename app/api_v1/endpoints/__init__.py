@@ -1,3 +1,4 @@
 from .organization import router as organizations_router  # noqa
 from .activity import router as activity_router  # noqa
 from .building import router as building_router  # noqa
+from .service import router as service_router  # noqa
@@ -1,45 +1,113 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.common.fieldsets import FieldSet
+from app.common.pagination import InvalidCursor, PageParams, page_params
+from app.common.response_cache import CachedRoute
+from app.core.config import settings
 from app.models import db_helper
 from app import crud, schemas
+from app.api_v1.conditional import table_not_modified
+from app.api_v1.fieldsets import activity_fieldset, organization_fieldset
 
 
 _logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/activities", tags=["Activities"])
+router = APIRouter(prefix="/activities", tags=["Activities"], route_class=CachedRoute)
 
 
-@router.get("/", response_model=list[schemas.ActivityReadFull])
+@router.get(
+    "/",
+    response_model=schemas.Page[schemas.ActivityReadFull],
+    dependencies=[Depends(table_not_modified)],
+)
 async def get_activities(
+    page: Annotated[PageParams, Depends(page_params)],
+    fieldset: Annotated[FieldSet | None, Depends(activity_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
     Получение списка всех видов деятельности, включая подвиды.
+    Постраничный вывод: следующая страница запрашивается по next_cursor.
+    Параметры fields и include ограничивают возвращаемые поля и связанные
+    объекты, остальные не загружаются из базы.
+    """
+    try:
+        if fieldset is None and settings.fast_read.enabled:
+            content = await crud.list_activities_json(db, page)
+            return Response(content=content, media_type="application/json")
+        activities, next_cursor = await crud.list_activities(
+            db, page, fieldset=fieldset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fieldset is not None:
+        return ORJSONResponse(
+            {
+                "items": [fieldset.dump(activity) for activity in activities],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"items": activities, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/tree",
+    response_model=list[schemas.ActivityTreeNode],
+    dependencies=[Depends(table_not_modified)],
+)
+async def get_activity_tree(
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+):
+    """
+    Получение дерева видов деятельности: каждый вид встречается один раз,
+    подвиды вложены в поле children.
     """
-    activities = await crud.list_activities(db)
-    return activities
+    tree_json = await crud.get_activity_tree_json(db)
+    return Response(content=tree_json, media_type="application/json")
 
 
 @router.get(
-    "/{activity_id}/organizations", response_model=list[schemas.OrganizationReadFull]
+    "/{activity_id}/organizations",
+    response_model=schemas.Page[schemas.OrganizationReadFull],
+    dependencies=[Depends(table_not_modified)],
 )
 async def get_organizations_by_activity_id(
     activity_id: int,
+    page: Annotated[PageParams, Depends(page_params)],
+    fieldset: Annotated[FieldSet | None, Depends(organization_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
-    Получение списка организаций, относящихся к указанному виду деятельности.
-    Если вид деятельнсти верхнего уровня, то возврашает все организации,
-    относящиеся к его подвидам.
-    Максимальный уровень вложенности вида деятельности - 3.
+    Получение списка организаций, относящихся к указанному виду деятельности
+    или к любому из его подвидов на любой глубине вложенности.
+    Параметры fields и include ограничивают возвращаемые поля и связанные объекты.
     """
     try:
-        organizations = await crud.get_organizations_by_activity_id(db, activity_id)
+        if fieldset is None and settings.fast_read.enabled:
+            content = await crud.get_organizations_by_activity_id_json(
+                db, activity_id, page
+            )
+            return Response(content=content, media_type="application/json")
+        organizations, next_cursor = await crud.get_organizations_by_activity_id(
+            db, activity_id, page, fieldset=fieldset
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         _logger.error(f"Error getting organizations for activity {activity_id}: {e}")
         raise HTTPException(status_code=404, detail=str(e))
-    return organizations
+
+    if fieldset is not None:
+        return ORJSONResponse(
+            {
+                "items": [fieldset.dump(org) for org in organizations],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"items": organizations, "next_cursor": next_cursor}
@@ -1,46 +1,140 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.common.fieldsets import FieldSet
+from app.common.pagination import PageParams, page_params
+from app.common.response_cache import CachedRoute
+from app.common.streaming import StreamFormat, MEDIA_TYPES, serialize_chunks
+from app.core.config import settings
 from app.models import db_helper
 from app import crud, schemas
+from app.api_v1.conditional import table_not_modified
+from app.api_v1.fieldsets import building_fieldset, organization_fieldset
 
 
 _logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/buildings", tags=["Buildings"])
+router = APIRouter(prefix="/buildings", tags=["Buildings"], route_class=CachedRoute)
 
 
 @router.get(
     "/",
-    response_model=list[schemas.BuildingOrganizationsRead],
+    response_model=schemas.Page[schemas.BuildingOrganizationsRead],
+    dependencies=[Depends(table_not_modified)],
 )
 async def get_buildings(
+    page: Annotated[PageParams, Depends(page_params)],
+    fieldset: Annotated[FieldSet | None, Depends(building_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
     Получение списка всех зданий с их организациями.
+    Постраничный вывод: следующая страница запрашивается по next_cursor.
+    Параметры fields и include ограничивают возвращаемые поля и связанные
+    объекты, остальные не загружаются из базы.
     """
-    buildings = await crud.list_buildings(db)
-    return buildings
+    try:
+        if fieldset is None and settings.fast_read.enabled:
+            content = await crud.list_buildings_json(db, page)
+            return Response(content=content, media_type="application/json")
+        buildings, next_cursor = await crud.list_buildings(db, page, fieldset=fieldset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fieldset is not None:
+        return ORJSONResponse(
+            {
+                "items": [fieldset.dump(building) for building in buildings],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"items": buildings, "next_cursor": next_cursor}
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_buildings(
+    format: Annotated[
+        StreamFormat, Query(description="JSON-массив или NDJSON (объект на строку)")
+    ] = "json",
+):
+    """
+    Выгрузка всех зданий с их организациями потоком.
+    Записи читаются серверным курсором и отправляются частями, поэтому
+    потребление памяти не зависит от размера таблицы.
+    Формат записей совпадает с BuildingOrganizationsRead.
+    """
+
+    async def content():
+        # the request-scoped session is closed before the body is streamed
+        async with db_helper.session_factory() as session:
+            chunks = crud.stream_buildings(session, settings.streaming.chunk_size)
+            async for data in serialize_chunks(
+                chunks, schemas.BuildingOrganizationsRead, format
+            ):
+                yield data
+
+    return StreamingResponse(content(), media_type=MEDIA_TYPES[format])
+
+
+@router.post(
+    "/batch", response_model=schemas.BatchRead[schemas.BuildingOrganizationsRead]
+)
+async def get_buildings_batch(
+    batch: schemas.BatchRequest,
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+):
+    """
+    Получение зданий с их организациями по списку ID (не более 500)
+    за постоянное число запросов к базе. Здания возвращаются в порядке ID
+    в запросе, ID несуществующих зданий перечисляются в missing.
+    """
+    if settings.fast_read.enabled:
+        content = await crud.get_buildings_by_ids_json(db, batch.ids)
+        return Response(content=content, media_type="application/json")
+
+    buildings, missing = await crud.get_buildings_by_ids(db, batch.ids)
+    return {"items": buildings, "missing": missing}
 
 
 @router.get(
     "/{building_id}/organizations",
-    response_model=list[schemas.OrganizationReadFull],
+    response_model=schemas.Page[schemas.OrganizationReadFull],
+    dependencies=[Depends(table_not_modified)],
 )
 async def get_organizations_in_building(
     building_id: int,
+    page: Annotated[PageParams, Depends(page_params)],
+    fieldset: Annotated[FieldSet | None, Depends(organization_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
     Получение списка организаций, находящихся в здании с заданным ID.
+    Параметры fields и include ограничивают возвращаемые поля и связанные объекты.
     """
-    building = await crud.get_building(db, building_id)
-    if building is None:
+    if not await crud.building_exists(db, building_id):
         raise HTTPException(status_code=404, detail="Building not found")
 
-    organizations = await crud.get_organizations_in_building(db, building_id)
-    return organizations
+    try:
+        if fieldset is None and settings.fast_read.enabled:
+            content = await crud.get_organizations_in_building_json(
+                db, building_id, page
+            )
+            return Response(content=content, media_type="application/json")
+        organizations, next_cursor = await crud.get_organizations_in_building(
+            db, building_id, page, fieldset=fieldset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fieldset is not None:
+        return ORJSONResponse(
+            {
+                "items": [fieldset.dump(org) for org in organizations],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"items": organizations, "next_cursor": next_cursor}
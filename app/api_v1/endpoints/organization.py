@@ -1,57 +1,228 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.common.fieldsets import FieldSet
+from app.common.pagination import PageParams, page_params
+from app.common.response_cache import CachedRoute
+from app.common.streaming import StreamFormat, MEDIA_TYPES, serialize_chunks
+from app.core.config import settings
 from app.models import db_helper
 from app import crud, schemas
+from app.api_v1.conditional import organization_not_modified, table_not_modified
+from app.api_v1.fieldsets import organization_fieldset
+from app.crud.utils import get_tile_rectangle
 
 
 _logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/organizations", tags=["Organizations"])
+router = APIRouter(
+    prefix="/organizations", tags=["Organizations"], route_class=CachedRoute
+)
 
 
-@router.get("/", response_model=list[schemas.OrganizationReadFull])
+@router.get(
+    "/",
+    response_model=schemas.Page[schemas.OrganizationReadFull],
+    dependencies=[Depends(table_not_modified)],
+)
 async def get_organizations(
+    page: Annotated[PageParams, Depends(page_params)],
+    fieldset: Annotated[FieldSet | None, Depends(organization_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
     Получение списка всех организаций с их зданиями и видами деятельности.
+    Постраничный вывод: следующая страница запрашивается по next_cursor.
+    Параметры fields и include ограничивают возвращаемые поля и связанные
+    объекты, остальные не загружаются из базы.
     """
-    organizations = await crud.get_organizations(db)
-    return organizations
+    try:
+        if fieldset is None and settings.fast_read.enabled:
+            content = await crud.get_organizations_json(db, page)
+            return Response(content=content, media_type="application/json")
+        organizations, next_cursor = await crud.get_organizations(
+            db, page, fieldset=fieldset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fieldset is not None:
+        return ORJSONResponse(
+            {
+                "items": [fieldset.dump(org) for org in organizations],
+                "next_cursor": next_cursor,
+            }
+        )
+    return {"items": organizations, "next_cursor": next_cursor}
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_organizations(
+    format: Annotated[
+        StreamFormat, Query(description="JSON-массив или NDJSON (объект на строку)")
+    ] = "json",
+):
+    """
+    Выгрузка всех организаций с их зданиями и видами деятельности потоком.
+    Записи читаются серверным курсором и отправляются частями, поэтому
+    потребление памяти не зависит от размера таблицы.
+    Формат записей совпадает с OrganizationReadFull.
+    """
+
+    async def content():
+        # the request-scoped session is closed before the body is streamed
+        async with db_helper.session_factory() as session:
+            chunks = crud.stream_organizations(session, settings.streaming.chunk_size)
+            async for data in serialize_chunks(
+                chunks, schemas.OrganizationReadFull, format
+            ):
+                yield data
 
+    return StreamingResponse(content(), media_type=MEDIA_TYPES[format])
 
-@router.get("/{organization_id}", response_model=schemas.OrganizationReadFull)
+
+@router.get(
+    "/nearest",
+    response_model=list[schemas.OrganizationSearchResult],
+    dependencies=[Depends(table_not_modified)],
+)
+async def get_nearest_organizations(
+    lat: Annotated[float, Query(ge=-90, le=90, description="Широта")],
+    lng: Annotated[float, Query(ge=-180, le=180, description="Долгота")],
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+    k: Annotated[int, Query(ge=1, le=100, description="Количество организаций")] = 10,
+    activity_id: Annotated[
+        int | None, Query(description="ID вида деятельности, включая подвиды")
+    ] = None,
+):
+    """
+    Получение k ближайших к точке организаций, отсортированных по расстоянию.
+    Опционально фильтрует организации по виду деятельности.
+    """
+    try:
+        return await crud.get_nearest_organizations(
+            db, lat, lng, k, activity_id=activity_id
+        )
+    except ValueError as e:
+        _logger.error(f"Error getting nearest organizations: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}",
+    response_model=schemas.TileClusters,
+    dependencies=[Depends(table_not_modified)],
+)
+async def get_organization_tile(
+    z: Annotated[int, Path(ge=0, le=22)],
+    x: Annotated[int, Path(ge=0)],
+    y: Annotated[int, Path(ge=0)],
+    response: Response,
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+    grid: Annotated[
+        int, Query(ge=1, le=64, description="Количество ячеек по стороне тайла")
+    ] = 8,
+    activity_id: Annotated[
+        int | None, Query(description="ID вида деятельности, включая подвиды")
+    ] = None,
+):
+    """
+    Агрегация организаций в тайле z/x/y (Web Mercator) для отображения на карте.
+    Тайл делится на сетку grid x grid, для каждой непустой ячейки возвращается
+    центр и количество организаций.
+    """
+    if x >= 2**z or y >= 2**z:
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    lat_min, lat_max, lng_min, lng_max = get_tile_rectangle(z, x, y)
+    try:
+        clusters = await crud.get_organization_clusters(
+            db, lat_min, lat_max, lng_min, lng_max, grid, activity_id=activity_id
+        )
+    except ValueError as e:
+        _logger.error(f"Error aggregating tile {z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+    response.headers["Cache-Control"] = f"max-age={settings.tiles.cache_max_age}"
+    return schemas.TileClusters(z=z, x=x, y=y, clusters=clusters)
+
+
+@router.get(
+    "/{organization_id}",
+    response_model=schemas.OrganizationReadFull,
+    dependencies=[Depends(organization_not_modified)],
+)
 async def get_organization(
     organization_id: int,
+    fieldset: Annotated[FieldSet | None, Depends(organization_fieldset)],
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
     Получение информации об организации по ID.
+    Параметры fields и include ограничивают возвращаемые поля и связанные объекты.
     """
-    organization = await crud.get_organization(db, organization_id)
+    if fieldset is None and settings.fast_read.enabled:
+        content = await crud.get_organization_json(db, organization_id)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        return Response(content=content, media_type="application/json")
+
+    organization = await crud.get_organization(db, organization_id, fieldset=fieldset)
     if organization is None:
         raise HTTPException(status_code=404, detail="Organization not found")
+
+    if fieldset is not None:
+        return ORJSONResponse(fieldset.dump(organization))
     return organization
 
 
-@router.post("/search", response_model=list[schemas.OrganizationReadFull])
+@router.post("/batch", response_model=schemas.BatchRead[schemas.OrganizationReadFull])
+async def get_organizations_batch(
+    batch: schemas.BatchRequest,
+    db: Annotated[AsyncSession, Depends(db_helper.get_session)],
+):
+    """
+    Получение организаций по списку ID (не более 500) за постоянное число
+    запросов к базе. Организации возвращаются в порядке ID в запросе,
+    ID несуществующих организаций перечисляются в missing.
+    """
+    if settings.fast_read.enabled:
+        content = await crud.get_organizations_by_ids_json(db, batch.ids)
+        return Response(content=content, media_type="application/json")
+
+    organizations, missing = await crud.get_organizations_by_ids(db, batch.ids)
+    return {"items": organizations, "missing": missing}
+
+
+@router.post("/search", response_model=schemas.Page[schemas.OrganizationSearchResult])
 async def search_organizations(
     search_params: schemas.OrganizationSearchRequest,
     db: Annotated[AsyncSession, Depends(db_helper.get_session)],
 ):
     """
-    Поиск организаций с возможностью фильтрации:
-    - По названию организации
-    - По названию вида деятельности
-    - По радиусу от точки (lat, lng + radius)
-    - По прямоугольной области (min_lat, max_lat, min_lng, max_lng)
+    Поиск организаций с возможностью фильтрации.
+    Фильтры можно комбинировать, результат - организации, подходящие под все:
+    - По названию организации: вхождение подстроки или, при name_match=similarity,
+      похожесть названия не ниже similarity_threshold с сортировкой по похожести
+    - Полнотекстовый поиск (text) по названию и, при include_activities,
+      по названиям видов деятельности; результаты ранжируются по релевантности
+    - По названию вида деятельности (включая вложенные виды)
+    - По телефону (phone)
+    - По одной из областей: радиус от точки (lat, lng + radius), с расстоянием
+      до точки и опциональной сортировкой по нему (sort_by_distance);
+      прямоугольник (min_lat, max_lat, min_lng, max_lng);
+      один или несколько многоугольников (polygons)
+
+    Результаты выводятся постранично по limit, следующая страница
+    запрашивается с cursor из next_cursor ответа при тех же фильтрах.
     """
     try:
-        return await crud.search_organizations(db, search_params)
+        organizations, next_cursor = await crud.search_organizations(db, search_params)
     except ValueError as e:
         _logger.error(f"Error searching organizations: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    return {"items": organizations, "next_cursor": next_cursor}
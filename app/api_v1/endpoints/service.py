@@ -0,0 +1,24 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter
+
+from app import schemas
+from app.common.cache import cache_registry
+
+router = APIRouter(prefix="/service", tags=["Service"])
+
+
+@router.get("/caches", response_model=list[schemas.CacheStatsRead])
+async def get_cache_stats():
+    """
+    Статистика внутренних кэшей приложения: попадания, промахи и вытеснения.
+    """
+    return [
+        schemas.CacheStatsRead(
+            name=name,
+            size=len(cache),
+            max_size=cache.max_size,
+            **asdict(cache.stats),
+        )
+        for name, cache in cache_registry.items()
+    ]
@@ -0,0 +1,18 @@
+from app import schemas
+from app.common.fieldsets import sparse_fieldset
+
+
+organization_fieldset = sparse_fieldset(
+    columns=("id", "name", "phones", "building_id"),
+    nested={"building": schemas.BuildingRead, "activities": schemas.ActivityRead},
+)
+
+building_fieldset = sparse_fieldset(
+    columns=("id", "address", "latitude", "longitude"),
+    nested={"organizations": schemas.OrganizationRead},
+)
+
+activity_fieldset = sparse_fieldset(
+    columns=("id", "name", "parent_id", "level"),
+    nested={"parent": schemas.ActivityRead, "children": schemas.ActivityRead},
+)
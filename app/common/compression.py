@@ -0,0 +1,78 @@
+import gzip
+import re
+from typing import Callable
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=settings.compression.gzip_level)
+
+
+def _zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=settings.compression.zstd_level).compress(
+        body
+    )
+
+
+# content codings in order of preference
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+ENCODERS["gzip"] = _gzip
+
+_ENCODED_ETAG = re.compile(r'-(?:%s)"$' % "|".join(ENCODERS))
+
+
+def _accepted(accept_encoding: str) -> dict[str, float]:
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    return weights
+
+
+def choose_encoding(accept_encoding: str | None, size: int) -> str | None:
+    """
+    Preferred content coding accepted by the client, None for identity.
+    Bodies smaller than compression.min_size are never compressed.
+    """
+    if (
+        not settings.compression.enabled
+        or not accept_encoding
+        or size < settings.compression.min_size
+    ):
+        return None
+
+    weights = _accepted(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](body)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # a strong ETag must differ between content codings of a representation
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def decoded_etag(etag: str) -> str:
+    return _ENCODED_ETAG.sub('"', etag)
@@ -0,0 +1,84 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping
+
+from fastapi import HTTPException, Request, status
+
+from .compression import decoded_etag
+
+
+@dataclass(frozen=True)
+class Validators:
+    """
+    Strong ETag and Last-Modified of a representation.
+    """
+
+    etag: str
+    last_modified: datetime | None = None
+
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.astimezone(timezone.utc), usegmt=True
+            )
+        return headers
+
+
+def make_etag(*parts: object) -> str:
+    digest = hashlib.sha256("\n".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison; the tag of any content coding
+    # of the representation matches
+    tags = {
+        decoded_etag(tag.strip().removeprefix("W/")) for tag in if_none_match.split(",")
+    }
+    return decoded_etag(etag.removeprefix("W/")) in tags
+
+
+def is_not_modified(
+    headers: Mapping[str, str],
+    etag: str | None,
+    last_modified: datetime | None,
+) -> bool:
+    """
+    Evaluates If-None-Match, or If-Modified-Since when it is absent.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have a resolution of one second
+    return last_modified.replace(microsecond=0) <= since
+
+
+def check_not_modified(request: Request, validators: Validators | None) -> None:
+    """
+    Remembers the validators for the response headers and answers
+    304 Not Modified when the client already has this representation.
+    """
+    if validators is None:
+        return
+
+    request.state.validators = validators
+    if is_not_modified(request.headers, validators.etag, validators.last_modified):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=validators.headers(),
+        )
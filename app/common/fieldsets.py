@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Callable, Mapping
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    """
+    Requested columns and relationships of a resource.
+    `nested` maps each relationship to the schema its objects are dumped with.
+    """
+
+    fields: tuple[str, ...]
+    include: tuple[str, ...] = ()
+    nested: Mapping[str, type[BaseModel]] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        # the representation it selects; fields are dumped in this order
+        return f"fields={','.join(self.fields)};include={','.join(self.include)}"
+
+    def _dump_related(self, name: str, value: Any) -> Any:
+        schema = self.nested[name]
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return [schema.model_validate(item).model_dump() for item in value]
+        return schema.model_validate(value).model_dump()
+
+    def dump(self, obj: Any) -> dict[str, Any]:
+        data = {name: getattr(obj, name) for name in self.fields}
+        for name in self.include:
+            data[name] = self._dump_related(name, getattr(obj, name))
+        return data
+
+
+def _split(value: str | None) -> tuple[str, ...]:
+    if value is None:
+        return ()
+    # keep the order of the request, drop blanks and repeats
+    return tuple(
+        dict.fromkeys(part.strip() for part in value.split(",") if part.strip())
+    )
+
+
+def sparse_fieldset(
+    columns: tuple[str, ...],
+    nested: Mapping[str, type[BaseModel]],
+) -> Callable[..., FieldSet | None]:
+    """
+    Dependency parsing `fields` and `include` query parameters.
+    Returns None when neither is given, i.e. the full representation.
+    """
+
+    def dependency(
+        fields: Annotated[
+            str | None,
+            Query(description=f"Поля через запятую: {', '.join(columns)}"),
+        ] = None,
+        include: Annotated[
+            str | None,
+            Query(description=f"Связанные объекты через запятую: {', '.join(nested)}"),
+        ] = None,
+    ) -> FieldSet | None:
+        if fields is None and include is None:
+            return None
+
+        requested_fields = _split(fields) if fields is not None else columns
+        requested_include = _split(include)
+
+        unknown = [name for name in requested_fields if name not in columns]
+        unknown += [name for name in requested_include if name not in nested]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+
+        # id is always returned, pagination and clients rely on it
+        if "id" not in requested_fields:
+            requested_fields = ("id", *requested_fields)
+        return FieldSet(
+            fields=requested_fields,
+            include=requested_include,
+            nested={name: nested[name] for name in requested_include},
+        )
+
+    return dependency
@@ -0,0 +1,91 @@
+"""
+Z-order (Morton) cell ids of building coordinates.
+
+Latitude and longitude are quantized to CELL_BITS bits each and interleaved,
+so nearby points share id prefixes and a rectangle maps to a few id ranges.
+The building_cell_id() database function behind buildings.cell_id mirrors
+encode_cell in SQL.
+"""
+
+CELL_BITS = 16
+MAX_CELL_RANGES = 16
+
+_CELLS_PER_AXIS = 1 << CELL_BITS
+
+
+def _quantize_lat(lat: float) -> int:
+    return min(max(int((lat + 90) / 180 * _CELLS_PER_AXIS), 0), _CELLS_PER_AXIS - 1)
+
+
+def _quantize_lng(lng: float) -> int:
+    return min(max(int((lng + 180) / 360 * _CELLS_PER_AXIS), 0), _CELLS_PER_AXIS - 1)
+
+
+def _interleave(x: int, y: int) -> int:
+    code = 0
+    for i in range(CELL_BITS):
+        code |= ((x >> i) & 1) << (2 * i)
+        code |= ((y >> i) & 1) << (2 * i + 1)
+    return code
+
+
+def encode_cell(lat: float, lng: float) -> int:
+    return _interleave(_quantize_lng(lng), _quantize_lat(lat))
+
+
+def cell_ranges(
+    lat_min: float,
+    lat_max: float,
+    lng_min: float,
+    lng_max: float,
+    max_ranges: int = MAX_CELL_RANGES,
+) -> list[tuple[int, int]]:
+    """
+    Inclusive cell id ranges covering the rectangle.
+    The quadtree is refined while the number of ranges stays within
+    max_ranges, so the cover may be larger than the rectangle itself.
+    """
+    x_min, x_max = _quantize_lng(lng_min), _quantize_lng(lng_max)
+    y_min, y_max = _quantize_lat(lat_min), _quantize_lat(lat_max)
+
+    ranges = []
+    nodes = [(0, 0)]
+    for level in range(CELL_BITS + 1):
+        size = _CELLS_PER_AXIS >> level
+        partial = []
+        for x, y in nodes:
+            if x + size <= x_min or x > x_max or y + size <= y_min or y > y_max:
+                continue
+            if (
+                x_min <= x
+                and x + size - 1 <= x_max
+                and y_min <= y
+                and y + size - 1 <= y_max
+            ):
+                ranges.append((x, y, size))
+            else:
+                partial.append((x, y))
+
+        if not partial:
+            break
+        if level == CELL_BITS or len(ranges) + 4 * len(partial) > max_ranges:
+            ranges.extend((x, y, size) for x, y in partial)
+            break
+
+        half = size // 2
+        nodes = [
+            (x + dx, y + dy) for x, y in partial for dx in (0, half) for dy in (0, half)
+        ]
+
+    spans = sorted(
+        (_interleave(x, y), _interleave(x, y) + size * size - 1)
+        for x, y, size in ranges
+    )
+
+    merged: list[tuple[int, int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,61 @@
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import Annotated, Any
+
+import orjson
+from fastapi import HTTPException, Query, status
+
+from app.core.config import settings
+
+
+class InvalidCursor(ValueError):
+    """
+    A cursor that was not issued for this query: a bad request, whatever
+    the endpoint maps its other ValueErrors to.
+    """
+
+
+def encode_cursor(values: tuple | list) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+    if not isinstance(values, list) or not values:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """
+    Page size and the sort key values of the last row of the previous page.
+    """
+
+    limit: int
+    after: list[Any] | None = None
+
+    @classmethod
+    def from_cursor(cls, limit: int, cursor: str | None) -> "PageParams":
+        return cls(limit=limit, after=decode_cursor(cursor) if cursor else None)
+
+
+def page_params(
+    limit: Annotated[
+        int,
+        Query(ge=1, le=settings.pagination.max_limit, description="Размер страницы"),
+    ] = settings.pagination.default_limit,
+    cursor: Annotated[
+        str | None,
+        Query(description="Курсор следующей страницы (next_cursor)"),
+    ] = None,
+) -> PageParams:
+    try:
+        return PageParams.from_cursor(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,222 @@
+import hashlib
+from email.utils import parsedate_to_datetime
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from app.common.cache import CacheStats, TTLCache
+from app.common.compression import choose_encoding, compress, encoded_etag
+from app.common.conditional import is_not_modified
+from app.core.config import settings
+from app.crud import data_versions
+from app.models import db_helper
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    # compressed bodies by content coding, filled on first request for each
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_response(cls, response: Response) -> "CachedResponse":
+        return cls(
+            status_code=response.status_code,
+            headers=list(response.headers.items()),
+            body=response.body,
+        )
+
+    def encoded_body(self, encoding: str) -> bytes:
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def _encoding(self, request: Request) -> str | None:
+        return choose_encoding(request.headers.get("accept-encoding"), len(self.body))
+
+    def validators(self, request: Request) -> dict[str, str]:
+        """
+        ETag/Last-Modified of the representation sent for the request.
+        """
+        validators = {
+            name: value
+            for name, value in self.headers
+            if name in ("etag", "last-modified")
+        }
+        encoding = self._encoding(request)
+        if encoding is not None and "etag" in validators:
+            validators["etag"] = encoded_etag(validators["etag"], encoding)
+        return validators
+
+    def render(self, request: Request) -> Response:
+        """
+        Response in the content coding negotiated by Accept-Encoding.
+        """
+        headers = dict(self.headers)
+        headers.pop("content-length", None)
+        body = self.body
+        if settings.compression.enabled and len(body) >= settings.compression.min_size:
+            headers["vary"] = ", ".join(
+                filter(None, (headers.get("vary"), "Accept-Encoding"))
+            )
+
+        encoding = self._encoding(request)
+        if encoding is not None:
+            body = self.encoded_body(encoding)
+            headers["content-encoding"] = encoding
+            if "etag" in headers:
+                headers["etag"] = encoded_etag(headers["etag"], encoding)
+        return Response(content=body, status_code=self.status_code, headers=headers)
+
+    def is_not_modified(self, request: Request) -> bool:
+        headers = dict(self.headers)
+        last_modified = headers.get("last-modified")
+        return is_not_modified(
+            request.headers,
+            headers.get("etag"),
+            parsedate_to_datetime(last_modified) if last_modified else None,
+        )
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Storage of rendered responses by key.
+    Shared implementations (e.g. Redis) let several workers reuse entries;
+    keys already carry the data versions, so backends only need LRU/TTL.
+    """
+
+    stats: CacheStats
+
+    @abstractmethod
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: CachedResponse) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
+
+
+class LocalResponseCacheBackend(ResponseCacheBackend):
+    """
+    In-process LRU + TTL backend, reported as "responses" in cache_registry.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache("responses", max_size=max_size, ttl=ttl)
+        self.stats = self._cache.stats
+
+    async def get(self, key: str) -> CachedResponse | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: CachedResponse) -> None:
+        self._cache.set(key, value)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResponseCache:
+    """
+    Caches successful GET responses by path, query string, the configured
+    request headers and the current table versions from `data_versions`.
+    A write to any tracked table changes the key, so stale entries are
+    never served and age out of the backend.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, vary_headers: list[str]):
+        self.backend = backend
+        self.vary_headers = [header.lower() for header in vary_headers]
+
+    async def _key(self, request: Request) -> str:
+        async with db_helper.session_factory() as session:
+            versions = await data_versions.get(session)
+
+        parts = [request.method, request.url.path]
+        parts += [f"{k}={v}" for k, v in sorted(request.query_params.multi_items())]
+        # header values such as API keys only end up in the hash
+        parts += [f"{h}:{request.headers.get(h, '')}" for h in self.vary_headers]
+        parts += [f"{t}@{v.version}" for t, v in sorted(versions.items())]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    async def handle(self, request: Request, handler: Handler) -> Response:
+        key = await self._key(request)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            # a hit proves this key passed authorization, validators are safe
+            if cached.is_not_modified(request):
+                return Response(status_code=304, headers=cached.validators(request))
+
+            response = cached.render(request)
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+        response = await handle_conditional(request, handler)
+        if response.status_code == 200 and not isinstance(response, StreamingResponse):
+            # compressed variants are stored with the entry and reused
+            cached = CachedResponse.from_response(response)
+            await self.backend.set(key, cached)
+            response = cached.render(request)
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+
+async def handle_conditional(request: Request, handler: Handler) -> Response:
+    """
+    Adds the ETag/Last-Modified computed by the route dependencies
+    (see app.common.conditional) to a successful response.
+    """
+    response = await handler(request)
+    validators = getattr(request.state, "validators", None)
+    if validators is not None and response.status_code == 200:
+        response.headers.update(validators.headers())
+    return response
+
+
+response_cache = ResponseCache(
+    backend=LocalResponseCacheBackend(
+        max_size=settings.response_cache.max_size,
+        ttl=settings.response_cache.ttl,
+    ),
+    vary_headers=settings.response_cache.vary_headers,
+)
+
+
+class CachedRoute(APIRoute):
+    """
+    Route class serving GET requests through `response_cache`, adding
+    the ETag/Last-Modified validators set by the route dependencies and
+    compressing the body by Accept-Encoding (see app.common.compression).
+    Only responses that passed authorization are stored and the API key
+    is part of the key, so a hit never bypasses the router dependencies.
+    """
+
+    def get_route_handler(self) -> Handler:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handle_conditional(request, handler)
+            if settings.response_cache.enabled:
+                return await response_cache.handle(request, handler)
+
+            response = await handle_conditional(request, handler)
+            if response.status_code == 200 and not isinstance(
+                response, StreamingResponse
+            ):
+                # compressed on every request without the cache
+                response = CachedResponse.from_response(response).render(request)
+            return response
+
+        return cached_handler
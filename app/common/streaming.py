@@ -0,0 +1,40 @@
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from pydantic import BaseModel, TypeAdapter
+
+StreamFormat = Literal["json", "ndjson"]
+
+MEDIA_TYPES: dict[StreamFormat, str] = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+async def serialize_chunks(
+    chunks: AsyncIterator[Sequence[Any]],
+    schema: type[BaseModel],
+    stream_format: StreamFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Validates each chunk of ORM objects into `schema` and yields it as bytes:
+    pieces of a single JSON array or newline-delimited JSON documents.
+    """
+    adapter = TypeAdapter(list[schema])
+
+    if stream_format == "ndjson":
+        async for chunk in chunks:
+            items = adapter.validate_python(chunk, from_attributes=True)
+            yield b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+        return
+
+    yield b"["
+    first = True
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        items = adapter.validate_python(chunk, from_attributes=True)
+        # strip the brackets of the chunk array and splice it into the outer one
+        body = adapter.dump_json(items)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
@@ -39,6 +39,84 @@ class DatabaseConfig(BaseModel):
     }
 
 
+class GeoIndexConfig(BaseModel):
+    enabled: bool = True
+    # grid cell size in degrees (~5.5 km of latitude)
+    cell_size: float = 0.05
+    # the in-memory index is rebuilt when the buildings table version changes,
+    # or at the latest after this many seconds
+    refresh_interval: int = 300
+    # radius search runs as one SQL statement by default: cell_id ranges of the
+    # bounding boxes and the haversine check, with distances from the database.
+    # True takes the buildings in the circle from the index instead; that skips
+    # the SQL distance filter for small radii, but sends their ids back as an
+    # array parameter and keeps the index hot in every worker
+    radius_search: bool = False
+
+
+class GeoCacheConfig(BaseModel):
+    # candidate buildings of rectangle (and index radius) searches, served
+    # before the grid index or the database is asked
+    enabled: bool = True
+    # search coordinates are snapped to this step, degrees (~110 m)
+    precision: float = 0.001
+    # search radius is rounded up to this step, km
+    radius_step: float = 0.5
+    ttl: int = 60
+    max_size: int = 10_000
+
+
+class DataVersionsConfig(BaseModel):
+    # how often table versions are re-read from the database, seconds
+    check_interval: float = 1.0
+
+
+class ActivityTreeConfig(BaseModel):
+    # seconds before the in-memory activity tree is reloaded
+    ttl: int = 600
+
+
+class TilesConfig(BaseModel):
+    # Cache-Control max-age of aggregated tiles, seconds
+    cache_max_age: int = 300
+
+
+class PaginationConfig(BaseModel):
+    default_limit: int = 50
+    max_limit: int = 500
+
+
+class StreamingConfig(BaseModel):
+    # rows fetched from the server-side cursor and serialized per chunk
+    chunk_size: int = 1000
+
+
+class FastReadConfig(BaseModel):
+    # serve full representations of hot reads from column selects via orjson
+    enabled: bool = True
+    # let PostgreSQL build the nested JSON of organizations and buildings
+    # (json_build_object/json_agg) instead of stitching rows in Python
+    json_in_database: bool = False
+
+
+class ResponseCacheConfig(BaseModel):
+    enabled: bool = True
+    # entries are keyed on data versions; ttl only bounds memory use
+    ttl: int = 3600
+    max_size: int = 1000
+    # request headers that change the response or guard access to it
+    vary_headers: list[str] = ["API-Key"]
+
+
+class CompressionConfig(BaseModel):
+    # gzip always, zstd when the zstandard package is installed
+    enabled: bool = True
+    # smaller bodies are sent as is
+    min_size: int = 1024
+    gzip_level: int = 6
+    zstd_level: int = 3
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=(".env.template", ".env"),
@@ -52,6 +130,16 @@ class Settings(BaseSettings):
     logging: LoggingConfig = LoggingConfig()
     api_key: str = "SECRET"
     db: DatabaseConfig
+    geo_index: GeoIndexConfig = GeoIndexConfig()
+    geo_cache: GeoCacheConfig = GeoCacheConfig()
+    tiles: TilesConfig = TilesConfig()
+    activity_tree: ActivityTreeConfig = ActivityTreeConfig()
+    data_versions: DataVersionsConfig = DataVersionsConfig()
+    pagination: PaginationConfig = PaginationConfig()
+    streaming: StreamingConfig = StreamingConfig()
+    fast_read: FastReadConfig = FastReadConfig()
+    response_cache: ResponseCacheConfig = ResponseCacheConfig()
+    compression: CompressionConfig = CompressionConfig()
 
 
 settings = Settings()
@@ -1,17 +1,40 @@
 from .organization import (
     get_organization,
     get_organizations,
+    get_organizations_by_ids,
+    stream_organizations,
     get_organizations_by_activity_id,
     get_organizations_by_activity_name,
+    get_nearest_organizations,
+    get_organization_clusters,
     search_organizations,
 )
 
 from .activity import (
     list_activities,
+    get_activity_tree_json,
 )
 
 from .building import (
     list_buildings,
-    get_building,
+    get_buildings_by_ids,
+    stream_buildings,
+    building_exists,
     get_organizations_in_building,
 )
+
+from .spatial_index import building_index
+from .activity_tree import activity_tree
+from .data_versions import data_versions
+from .validators import get_table_validators, get_organization_validators
+
+from .fast_read import (
+    get_organization_json,
+    get_organizations_json,
+    get_organizations_by_ids_json,
+    get_organizations_in_building_json,
+    get_organizations_by_activity_id_json,
+    list_buildings_json,
+    get_buildings_by_ids_json,
+    list_activities_json,
+)
@@ -1,17 +1,36 @@
 from typing import Sequence
 
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
+from app.common.fieldsets import FieldSet
+from app.common.pagination import PageParams
+from .activity_tree import activity_tree
+from .pagination import fetch_page
+from .utils import load_options
+
+_LOADERS = {
+    # joined, so the parent loads even when parent_id is not selected
+    "parent": joinedload,
+    "children": selectinload,
+}
 
 
 async def list_activities(
     session: AsyncSession,
-) -> Sequence[models.Activity]:
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Activity], str | None]:
     stmt = select(models.Activity).options(
-        selectinload(models.Activity.children),
+        *load_options(models.Activity, fieldset, _LOADERS)
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    return await fetch_page(session, stmt, [(models.Activity.id, False)], page)
+
+
+async def get_activity_tree_json(
+    session: AsyncSession,
+) -> bytes:
+    snapshot = await activity_tree.get(session)
+    return snapshot.tree_json
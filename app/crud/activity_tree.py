@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from functools import cached_property
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from .data_versions import data_versions
+
+_logger = logging.getLogger(__name__)
+
+
+class ActivityTreeSnapshot:
+    """
+    Immutable copy of the activity taxonomy with a name index.
+    """
+
+    def __init__(self, rows: list[tuple[int, str, int | None, int]]):
+        self.names: dict[int, str] = {}
+        self.levels: dict[int, int] = {}
+        self.roots: list[int] = []
+        self.children: dict[int, list[int]] = defaultdict(list)
+        for activity_id, name, parent_id, level in rows:
+            self.names[activity_id] = name
+            self.levels[activity_id] = level
+            if parent_id is None:
+                self.roots.append(activity_id)
+            else:
+                self.children[parent_id].append(activity_id)
+
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+        for activity_id, name in self.names.items():
+            self._by_name[name.casefold()].append(activity_id)
+
+    def __contains__(self, activity_id: int) -> bool:
+        return activity_id in self.names
+
+    def _tree_node(self, activity_id: int) -> dict:
+        # key order follows schemas.ActivityTreeNode
+        return {
+            "id": activity_id,
+            "name": self.names[activity_id],
+            "level": self.levels[activity_id],
+            "children": [
+                self._tree_node(child_id)
+                for child_id in self.children.get(activity_id, ())
+            ],
+        }
+
+    @cached_property
+    def tree_json(self) -> bytes:
+        """
+        The whole taxonomy as nested JSON, serialized once per snapshot.
+        """
+        return orjson.dumps([self._tree_node(root_id) for root_id in self.roots])
+
+    def find_by_name(self, name: str) -> int | None:
+        """
+        Exact case-insensitive match, otherwise the only activity
+        whose name contains `name`.
+        """
+        needle = name.casefold()
+        matches = self._by_name.get(needle)
+        if not matches:
+            matches = [
+                activity_id
+                for key, ids in self._by_name.items()
+                if needle in key
+                for activity_id in ids
+            ]
+
+        if len(matches) > 1:
+            raise ValueError(f"Multiple activities match the name {name!r}")
+        return matches[0] if matches else None
+
+
+class ActivityTree:
+    """
+    Process-wide holder of the activity snapshot.
+    Reloaded when the `activities` table version changes or after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: ActivityTreeSnapshot | None = None
+        self._snapshot_version = -1
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, version: int) -> bool:
+        return (
+            self._snapshot is not None
+            and self._snapshot_version == version
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def load(self, session: AsyncSession, version: int) -> ActivityTreeSnapshot:
+        stmt = select(
+            models.Activity.id,
+            models.Activity.name,
+            models.Activity.parent_id,
+            models.Activity.level,
+        ).order_by(models.Activity.id)
+        result = await session.execute(stmt)
+
+        self._snapshot = ActivityTreeSnapshot(result.all())
+        self._snapshot_version = version
+        self._loaded_at = time.monotonic()
+        _logger.info(f"Activity tree loaded: {len(self._snapshot.names)} activities.")
+        return self._snapshot
+
+    async def get(self, session: AsyncSession) -> ActivityTreeSnapshot:
+        table_version = await data_versions.version(session, "activities")
+        version = table_version.version
+        if self._is_fresh(version):
+            return self._snapshot
+
+        async with self._lock:
+            if self._is_fresh(version):
+                return self._snapshot
+            return await self.load(session, version)
+
+
+activity_tree = ActivityTree(ttl=settings.activity_tree.ttl)
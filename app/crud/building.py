@@ -1,71 +1,90 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, exists
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models
+from app.common.fieldsets import FieldSet
+from app.common.pagination import PageParams
+from .pagination import fetch_page
+from .loaders import load_organization_relations, relations_of
+from .utils import load_options, order_by_ids
 
+_LOADERS = {
+    "organizations": selectinload,
+}
+_ORGANIZATION_LOADERS = {
+    "building": joinedload,
+}
 
-async def get_building(
+
+async def building_exists(
     session: AsyncSession,
     building_id: int,
-) -> models.Building | None:
+) -> bool:
+    stmt = select(exists().where(models.Building.id == building_id))
+    return await session.scalar(stmt)
+
+
+async def get_buildings_by_ids(
+    session: AsyncSession,
+    ids: Sequence[int],
+) -> tuple[list[models.Building], list[int]]:
     stmt = (
         select(models.Building)
         .options(
             selectinload(models.Building.organizations),
         )
-        .where(models.Building.id == building_id)
+        .where(models.Building.id.in_(ids))
     )
     result = await session.execute(stmt)
-    return result.scalar_one_or_none()
+    return order_by_ids(result.scalars().all(), ids)
 
 
 async def list_buildings(
     session: AsyncSession,
-) -> Sequence[models.Building]:
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Building], str | None]:
     stmt = select(models.Building).options(
-        selectinload(models.Building.organizations),
+        *load_options(models.Building, fieldset, _LOADERS)
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    return await fetch_page(session, stmt, [(models.Building.id, False)], page)
 
 
-async def get_organizations_in_building(
+async def stream_buildings(
     session: AsyncSession,
-    building_id: int,
-) -> Sequence[models.Organization]:
+    chunk_size: int,
+) -> AsyncIterator[Sequence[models.Building]]:
     stmt = (
-        select(models.Organization)
-        .where(models.Organization.building_id == building_id)
+        select(models.Building)
         .options(
-            joinedload(models.Organization.building),
-            selectinload(models.Organization.activities),
+            selectinload(models.Building.organizations),
         )
+        .order_by(models.Building.id)
+        .execution_options(yield_per=chunk_size)
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    result = await session.stream(stmt)
+    async for partition in result.scalars().partitions():
+        yield partition
+        # keep the identity map from growing with the table
+        session.expunge_all()
 
 
-async def get_buildings_in_rectangle(
+async def get_organizations_in_building(
     session: AsyncSession,
-    lat_min: float,
-    lat_max: float,
-    lng_min: float,
-    lng_max: float,
-) -> Sequence[models.Building]:
+    building_id: int,
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Organization], str | None]:
     stmt = (
-        select(models.Building)
-        .where(
-            and_(
-                models.Building.latitude.between(lat_min, lat_max),
-                models.Building.longitude.between(lng_min, lng_max),
-            )
-        )
-        .options(
-            selectinload(models.Building.organizations),
-        )
+        select(models.Organization)
+        .where(models.Organization.building_id == building_id)
+        .options(*load_options(models.Organization, fieldset, _ORGANIZATION_LOADERS))
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    organizations, next_cursor = await fetch_page(
+        session, stmt, [(models.Organization.id, False)], page
+    )
+    await load_organization_relations(session, organizations, relations_of(fieldset))
+    return organizations, next_cursor
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class TableVersion:
+    version: int
+    updated_at: datetime | None
+
+
+UNKNOWN_VERSION = TableVersion(version=0, updated_at=None)
+
+
+class DataVersions:
+    """
+    Per-table change counters maintained by triggers in `data_versions`.
+    Re-read from the database at most once per `check_interval` seconds.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._versions: dict[str, TableVersion] = {}
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        )
+
+    async def load(self, session: AsyncSession) -> dict[str, TableVersion]:
+        table = models.data_versions_table
+        result = await session.execute(
+            select(table.c.table_name, table.c.version, table.c.updated_at)
+        )
+        self._versions = {
+            table_name: TableVersion(version, updated_at)
+            for table_name, version, updated_at in result
+        }
+        self._checked_at = time.monotonic()
+        return self._versions
+
+    async def get(self, session: AsyncSession) -> dict[str, TableVersion]:
+        if self.is_fresh:
+            return self._versions
+
+        async with self._lock:
+            if self.is_fresh:
+                return self._versions
+            return await self.load(session)
+
+    async def version(self, session: AsyncSession, table_name: str) -> TableVersion:
+        versions = await self.get(session)
+        return versions.get(table_name, UNKNOWN_VERSION)
+
+
+data_versions = DataVersions(check_interval=settings.data_versions.check_interval)
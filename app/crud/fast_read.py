@@ -0,0 +1,464 @@
+"""
+Read path of the hot endpoints without ORM hydration and schema validation.
+
+Column selects are mapped into slotted records declaring the fields in the
+order of the response schemas and dumped with orjson, which serializes
+dataclasses natively. Nested lists are ordered by id, as the ORM
+relationships are, so the resulting bytes equal the responses rendered through
+the schemas (see tests/test_fast_read.py).
+
+With fast_read.json_in_database the nested organization and building objects
+are assembled by PostgreSQL (json_build_object/json_agg) in one statement and
+passed through as text. That JSON is equivalent, but not byte-identical:
+PostgreSQL formats it with spaces after separators.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+import orjson
+from sqlalchemy import select, func, literal_column, Row, ColumnElement, Text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.common.pagination import PageParams
+from app.core.config import settings
+from .pagination import fetch_rows_page
+from .utils import resolve_activity_id, activity_subtree_clause, order_by_ids
+
+
+# schemas.BuildingRead
+@dataclass(slots=True)
+class BuildingRecord:
+    address: str
+    latitude: float
+    longitude: float
+    id: int
+
+
+# schemas.ActivityRead
+@dataclass(slots=True)
+class ActivityRecord:
+    name: str
+    parent_id: int | None
+    level: int
+    id: int
+
+
+# schemas.OrganizationRead
+@dataclass(slots=True)
+class OrganizationRecord:
+    name: str
+    phones: list[str]
+    building_id: int
+    id: int
+
+
+# schemas.OrganizationReadFull
+@dataclass(slots=True)
+class OrganizationFullRecord:
+    name: str
+    phones: list[str]
+    building_id: int
+    id: int
+    building: BuildingRecord
+    activities: list[ActivityRecord]
+
+
+# schemas.BuildingOrganizationsRead
+@dataclass(slots=True)
+class BuildingOrganizationsRecord:
+    address: str
+    latitude: float
+    longitude: float
+    id: int
+    organizations: list[OrganizationRecord]
+
+
+# schemas.ActivityReadFull
+@dataclass(slots=True)
+class ActivityFullRecord:
+    name: str
+    parent_id: int | None
+    level: int
+    id: int
+    parent: ActivityRecord | None
+    children: list[ActivityRecord]
+
+
+_ORGANIZATION_COLUMNS = (
+    models.Organization.name,
+    models.Organization.phones,
+    models.Organization.building_id,
+    models.Organization.id,
+)
+_BUILDING_COLUMNS = (
+    models.Building.address,
+    models.Building.latitude,
+    models.Building.longitude,
+    models.Building.id,
+)
+_ACTIVITY_COLUMNS = (
+    models.Activity.name,
+    models.Activity.parent_id,
+    models.Activity.level,
+    models.Activity.id,
+)
+
+
+def _dump_page(items: list[Any], next_cursor: str | None) -> bytes:
+    return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+
+def _join_page(items: Iterable[str], next_cursor: str | None) -> bytes:
+    # items are JSON documents rendered by the database
+    return b"".join(
+        (
+            b'{"items":[',
+            ",".join(items).encode(),
+            b'],"next_cursor":',
+            orjson.dumps(next_cursor),
+            b"}",
+        )
+    )
+
+
+def _dump_batch(items: list[Any], missing: list[int]) -> bytes:
+    return orjson.dumps({"items": items, "missing": missing})
+
+
+def _join_batch(items: dict[int, str], ids: Sequence[int]) -> bytes:
+    # items are JSON documents rendered by the database, by id
+    return b"".join(
+        (
+            b'{"items":[',
+            ",".join(items[item_id] for item_id in ids if item_id in items).encode(),
+            b'],"missing":',
+            orjson.dumps([item_id for item_id in ids if item_id not in items]),
+            b"}",
+        )
+    )
+
+
+def _json_object(**fields: ColumnElement) -> ColumnElement:
+    # keys are inlined: json_build_object cannot infer types of bound keys
+    return func.json_build_object(
+        *(
+            arg
+            for key, value in fields.items()
+            for arg in (literal_column(f"'{key}'"), value)
+        )
+    )
+
+
+def _json_array(element: ColumnElement, order_by: ColumnElement) -> ColumnElement:
+    return func.coalesce(
+        func.json_agg(aggregate_order_by(element, order_by)),
+        literal_column("'[]'::json"),
+    )
+
+
+def _organization_json() -> ColumnElement:
+    """
+    schemas.OrganizationReadFull of the organization row joined with its building.
+    """
+    rel = models.organization_activity_rel_table
+    activities = (
+        select(
+            _json_array(
+                _json_object(
+                    name=models.Activity.name,
+                    parent_id=models.Activity.parent_id,
+                    level=models.Activity.level,
+                    id=models.Activity.id,
+                ),
+                models.Activity.id,
+            )
+        )
+        .select_from(rel)
+        .join(models.Activity, models.Activity.id == rel.c.activity_id)
+        .where(rel.c.organization_id == models.Organization.id)
+        .scalar_subquery()
+    )
+    return _json_object(
+        name=models.Organization.name,
+        phones=func.coalesce(
+            models.Organization.phones, literal_column("'{}'::varchar[]")
+        ),
+        building_id=models.Organization.building_id,
+        id=models.Organization.id,
+        building=_json_object(
+            address=models.Building.address,
+            latitude=models.Building.latitude,
+            longitude=models.Building.longitude,
+            id=models.Building.id,
+        ),
+        activities=activities,
+    ).cast(Text)
+
+
+def _building_json() -> ColumnElement:
+    """
+    schemas.BuildingOrganizationsRead of the building row.
+    """
+    organizations = (
+        select(
+            _json_array(
+                _json_object(
+                    name=models.Organization.name,
+                    phones=func.coalesce(
+                        models.Organization.phones, literal_column("'{}'::varchar[]")
+                    ),
+                    building_id=models.Organization.building_id,
+                    id=models.Organization.id,
+                ),
+                models.Organization.id,
+            )
+        )
+        .where(models.Organization.building_id == models.Building.id)
+        .scalar_subquery()
+    )
+    return _json_object(
+        address=models.Building.address,
+        latitude=models.Building.latitude,
+        longitude=models.Building.longitude,
+        id=models.Building.id,
+        organizations=organizations,
+    ).cast(Text)
+
+
+async def _activities_of(
+    session: AsyncSession,
+    organization_ids: Iterable[int],
+) -> dict[int, list[ActivityRecord]]:
+    rel = models.organization_activity_rel_table
+    stmt = (
+        select(rel.c.organization_id, *_ACTIVITY_COLUMNS)
+        .join(models.Activity, models.Activity.id == rel.c.activity_id)
+        .where(rel.c.organization_id.in_(list(organization_ids)))
+        .order_by(rel.c.organization_id, models.Activity.id)
+    )
+    result = await session.execute(stmt)
+
+    activities: dict[int, list[ActivityRecord]] = defaultdict(list)
+    for organization_id, name, parent_id, level, activity_id in result:
+        activities[organization_id].append(
+            ActivityRecord(name, parent_id, level, activity_id)
+        )
+    return activities
+
+
+async def _building_records(
+    session: AsyncSession,
+    rows: Sequence[Row],
+) -> list[BuildingOrganizationsRecord]:
+    # rows: building columns
+    organizations: dict[int, list[OrganizationRecord]] = defaultdict(list)
+    if rows:
+        stmt = (
+            select(*_ORGANIZATION_COLUMNS)
+            .where(models.Organization.building_id.in_([row[3] for row in rows]))
+            .order_by(models.Organization.id)
+        )
+        for name, phones, building_id, organization_id in await session.execute(stmt):
+            organizations[building_id].append(
+                OrganizationRecord(name, phones or [], building_id, organization_id)
+            )
+
+    return [
+        BuildingOrganizationsRecord(
+            address,
+            latitude,
+            longitude,
+            building_id,
+            organizations.get(building_id, []),
+        )
+        for address, latitude, longitude, building_id, *_ in rows
+    ]
+
+
+async def _organization_records(
+    session: AsyncSession,
+    rows: Sequence[Row],
+) -> list[OrganizationFullRecord]:
+    # rows: organization columns, then building columns
+    if not rows:
+        return []
+    activities = await _activities_of(session, (row[3] for row in rows))
+
+    records = []
+    for row in rows:
+        name, phones, building_id, organization_id, address, lat, lng = row[:7]
+        records.append(
+            OrganizationFullRecord(
+                name,
+                phones or [],
+                building_id,
+                organization_id,
+                BuildingRecord(address, lat, lng, building_id),
+                activities.get(organization_id, []),
+            )
+        )
+    return records
+
+
+def _organizations_stmt():
+    if settings.fast_read.json_in_database:
+        columns = (_organization_json(),)
+    else:
+        columns = (*_ORGANIZATION_COLUMNS, *_BUILDING_COLUMNS[:3])
+    return select(*columns).join(
+        models.Building, models.Building.id == models.Organization.building_id
+    )
+
+
+async def get_organization_json(
+    session: AsyncSession,
+    organization_id: int,
+) -> bytes | None:
+    stmt = _organizations_stmt().where(models.Organization.id == organization_id)
+    rows = (await session.execute(stmt)).all()
+    if not rows:
+        return None
+    if settings.fast_read.json_in_database:
+        return rows[0][0].encode()
+
+    (record,) = await _organization_records(session, rows)
+    return orjson.dumps(record)
+
+
+async def get_organizations_by_ids_json(
+    session: AsyncSession,
+    ids: Sequence[int],
+) -> bytes:
+    if settings.fast_read.json_in_database:
+        stmt = (
+            _organizations_stmt()
+            .add_columns(models.Organization.id)
+            .where(models.Organization.id.in_(ids))
+        )
+        rows = await session.execute(stmt)
+        return _join_batch({row[1]: row[0] for row in rows}, ids)
+
+    stmt = _organizations_stmt().where(models.Organization.id.in_(ids))
+    rows = (await session.execute(stmt)).all()
+    return _dump_batch(*order_by_ids(await _organization_records(session, rows), ids))
+
+
+async def _organizations_page_json(
+    session: AsyncSession,
+    condition: ColumnElement[bool] | None,
+    page: PageParams,
+) -> bytes:
+    stmt = _organizations_stmt()
+    if condition is not None:
+        stmt = stmt.where(condition)
+
+    rows, next_cursor = await fetch_rows_page(
+        session, stmt, [(models.Organization.id, False)], page
+    )
+    if settings.fast_read.json_in_database:
+        return _join_page((row[0] for row in rows), next_cursor)
+    return _dump_page(await _organization_records(session, rows), next_cursor)
+
+
+async def get_organizations_json(
+    session: AsyncSession,
+    page: PageParams,
+) -> bytes:
+    return await _organizations_page_json(session, None, page)
+
+
+async def get_organizations_in_building_json(
+    session: AsyncSession,
+    building_id: int,
+    page: PageParams,
+) -> bytes:
+    return await _organizations_page_json(
+        session, models.Organization.building_id == building_id, page
+    )
+
+
+async def get_organizations_by_activity_id_json(
+    session: AsyncSession,
+    activity_id: int,
+    page: PageParams,
+) -> bytes:
+    activity_id = await resolve_activity_id(session, activity_id=activity_id)
+    return await _organizations_page_json(
+        session, activity_subtree_clause(activity_id), page
+    )
+
+
+async def list_buildings_json(
+    session: AsyncSession,
+    page: PageParams,
+) -> bytes:
+    if settings.fast_read.json_in_database:
+        rows, next_cursor = await fetch_rows_page(
+            session, select(_building_json()), [(models.Building.id, False)], page
+        )
+        return _join_page((row[0] for row in rows), next_cursor)
+
+    rows, next_cursor = await fetch_rows_page(
+        session, select(*_BUILDING_COLUMNS), [(models.Building.id, False)], page
+    )
+    return _dump_page(await _building_records(session, rows), next_cursor)
+
+
+async def get_buildings_by_ids_json(
+    session: AsyncSession,
+    ids: Sequence[int],
+) -> bytes:
+    if settings.fast_read.json_in_database:
+        stmt = select(models.Building.id, _building_json()).where(
+            models.Building.id.in_(ids)
+        )
+        return _join_batch(dict((await session.execute(stmt)).all()), ids)
+
+    stmt = select(*_BUILDING_COLUMNS).where(models.Building.id.in_(ids))
+    rows = (await session.execute(stmt)).all()
+    return _dump_batch(*order_by_ids(await _building_records(session, rows), ids))
+
+
+async def list_activities_json(
+    session: AsyncSession,
+    page: PageParams,
+) -> bytes:
+    rows, next_cursor = await fetch_rows_page(
+        session, select(*_ACTIVITY_COLUMNS), [(models.Activity.id, False)], page
+    )
+
+    ids = [row[3] for row in rows]
+    parent_ids = {row[1] for row in rows if row[1] is not None}
+    related: dict[int, ActivityRecord] = {}
+    children: dict[int, list[ActivityRecord]] = defaultdict(list)
+    if rows:
+        # parents and children of the page in one query
+        stmt = (
+            select(*_ACTIVITY_COLUMNS)
+            .where(
+                models.Activity.id.in_(parent_ids) | models.Activity.parent_id.in_(ids)
+            )
+            .order_by(models.Activity.id)
+        )
+        for name, parent_id, level, activity_id in await session.execute(stmt):
+            record = ActivityRecord(name, parent_id, level, activity_id)
+            related[activity_id] = record
+            if parent_id is not None:
+                children[parent_id].append(record)
+
+    records = [
+        ActivityFullRecord(
+            name,
+            parent_id,
+            level,
+            activity_id,
+            related.get(parent_id) if parent_id is not None else None,
+            children.get(activity_id, []),
+        )
+        for name, parent_id, level, activity_id, *_ in rows
+    ]
+    return _dump_page(records, next_cursor)
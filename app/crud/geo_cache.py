@@ -0,0 +1,170 @@
+import math
+
+import numpy as np
+from sqlalchemy import select, and_, ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.common.cache import TTLCache
+from app.core.config import settings
+from .data_versions import data_versions
+from .spatial_index import building_index, CellPoints, KM_PER_DEGREE
+from .utils import (
+    Rectangle,
+    get_search_rectangles,
+    rectangles_clause,
+    distance_expression,
+    filter_by_radius,
+    filter_by_rectangle,
+    filter_by_polygon,
+    get_polygon_rectangle,
+)
+
+# candidate buildings of snapped geo queries, refined per request; in front of
+# both the grid index and the SQL lookup, a hit skips scanning their cells.
+# Keys carry the buildings table version, so writes never serve stale sets
+geo_cache = TTLCache(
+    "geo",
+    max_size=settings.geo_cache.max_size,
+    ttl=settings.geo_cache.ttl,
+)
+
+
+async def _buildings_version(session: AsyncSession) -> int:
+    table_version = await data_versions.version(session, "buildings")
+    return table_version.version
+
+
+def _snap(value: float, step: float, rounding=round) -> float:
+    # the outer round() drops float noise so equal cells give equal keys
+    return round(rounding(value / step) * step, 9)
+
+
+async def _load_points(
+    session: AsyncSession,
+    condition: ColumnElement[bool],
+) -> CellPoints:
+    stmt = select(
+        models.Building.id,
+        models.Building.latitude,
+        models.Building.longitude,
+    ).where(condition)
+    rows = (await session.execute(stmt)).all()
+
+    return (
+        np.array([row[0] for row in rows], dtype=np.int64),
+        np.array([row[1] for row in rows], dtype=np.float64),
+        np.array([row[2] for row in rows], dtype=np.float64),
+    )
+
+
+async def _points_within_radius(
+    session: AsyncSession,
+    lat: float,
+    lng: float,
+    radius_km: float,
+) -> CellPoints:
+    if settings.geo_index.enabled:
+        await building_index.ensure_fresh(session)
+        return building_index.points_within_radius(lat, lng, radius_km)
+
+    return await _load_points(
+        session,
+        and_(
+            rectangles_clause(get_search_rectangles(lat, lng, radius_km)),
+            distance_expression(lat, lng) <= radius_km,
+        ),
+    )
+
+
+async def get_points_in_rectangle(
+    session: AsyncSession,
+    rectangle: Rectangle,
+) -> CellPoints:
+    if settings.geo_index.enabled:
+        await building_index.ensure_fresh(session)
+        return building_index.points_in_rectangle(rectangle)
+
+    return await _load_points(session, rectangles_clause([rectangle]))
+
+
+async def get_building_ids_in_radius(
+    session: AsyncSession,
+    lat: float,
+    lng: float,
+    radius_km: float,
+) -> list[int]:
+    if settings.geo_cache.enabled:
+        precision = settings.geo_cache.precision
+        key_lat = _snap(lat, precision)
+        key_lng = _snap(lng, precision)
+        key_radius = _snap(radius_km, settings.geo_cache.radius_step, math.ceil)
+        version = await _buildings_version(session)
+        key = ("radius", version, key_lat, key_lng, key_radius)
+
+        points = geo_cache.get(key)
+        if points is None:
+            # widen the snapped circle by the snapping error to cover the exact one
+            points = await _points_within_radius(
+                session, key_lat, key_lng, key_radius + precision * KM_PER_DEGREE
+            )
+            geo_cache.set(key, points)
+    else:
+        points = await _points_within_radius(session, lat, lng, radius_km)
+
+    ids, latitudes, longitudes = points
+    _, mask = filter_by_radius(lat, lng, latitudes, longitudes, radius_km)
+    return ids[mask].tolist()
+
+
+async def _candidates_in_rectangle(
+    session: AsyncSession,
+    rectangle: Rectangle,
+) -> CellPoints:
+    """
+    Buildings in the rectangle, or with the cache in a snapped rectangle
+    containing it; the caller applies the exact filter.
+    """
+    if not settings.geo_cache.enabled:
+        return await get_points_in_rectangle(session, rectangle)
+
+    precision = settings.geo_cache.precision
+    lat_min, lat_max, lng_min, lng_max = rectangle
+    # snap outwards so the cached rectangle contains the exact one
+    key_rectangle = (
+        _snap(lat_min, precision, math.floor),
+        _snap(lat_max, precision, math.ceil),
+        _snap(lng_min, precision, math.floor),
+        _snap(lng_max, precision, math.ceil),
+    )
+    version = await _buildings_version(session)
+    key = ("rectangle", version, *key_rectangle)
+
+    points = geo_cache.get(key)
+    if points is None:
+        points = await get_points_in_rectangle(session, key_rectangle)
+        geo_cache.set(key, points)
+    return points
+
+
+async def get_building_ids_in_rectangle(
+    session: AsyncSession,
+    rectangle: Rectangle,
+) -> list[int]:
+    ids, latitudes, longitudes = await _candidates_in_rectangle(session, rectangle)
+    return ids[filter_by_rectangle(latitudes, longitudes, rectangle)].tolist()
+
+
+async def get_building_ids_in_polygons(
+    session: AsyncSession,
+    polygons: list[list[tuple[float, float]]],
+) -> list[int]:
+    building_ids: set[int] = set()
+    for polygon in polygons:
+        ids, latitudes, longitudes = await _candidates_in_rectangle(
+            session, get_polygon_rectangle(polygon)
+        )
+        building_ids.update(
+            ids[filter_by_polygon(latitudes, longitudes, polygon)].tolist()
+        )
+    return sorted(building_ids)
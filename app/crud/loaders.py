@@ -0,0 +1,136 @@
+"""
+Request-scoped batching of related rows.
+
+A session serves one request, so the loaders live in `session.info`. Every
+lookup of buildings and of organization activities goes through `load_many`:
+ids not seen yet in the request are fetched in one query, the rest come from
+the memo. Buildings loaded by the statement itself seed the memo too.
+Relationships are set with `set_committed_value`, so the ORM treats them
+as loaded and never lazy loads them.
+"""
+
+from collections import defaultdict
+from typing import Awaitable, Callable, Generic, Hashable, Iterable, Sequence, TypeVar
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import models
+from app.common.fieldsets import FieldSet
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFetch = Callable[[AsyncSession, list[K]], Awaitable[dict[K, V]]]
+
+
+class Loader(Generic[K, V]):
+    """
+    Memoized batch lookup by key; keys without a row resolve to `default()`.
+    """
+
+    def __init__(
+        self, fetch: BatchFetch, default: Callable[[], V | None] = lambda: None
+    ):
+        self._fetch = fetch
+        self._default = default
+        self._memo: dict[K, V | None] = {}
+
+    def prime(self, key: K, value: V) -> None:
+        self._memo.setdefault(key, value)
+
+    async def load_many(
+        self, session: AsyncSession, keys: Iterable[K]
+    ) -> dict[K, V | None]:
+        keys = list(dict.fromkeys(keys))
+        missing = [key for key in keys if key not in self._memo]
+        if missing:
+            found = await self._fetch(session, missing)
+            for key in missing:
+                self._memo[key] = found.get(key, self._default())
+        return {key: self._memo[key] for key in keys}
+
+
+async def _fetch_buildings(
+    session: AsyncSession, ids: list[int]
+) -> dict[int, models.Building]:
+    result = await session.execute(
+        select(models.Building).where(models.Building.id.in_(ids))
+    )
+    return {building.id: building for building in result.scalars()}
+
+
+async def _fetch_organization_activities(
+    session: AsyncSession, organization_ids: list[int]
+) -> dict[int, list[models.Activity]]:
+    # links and activities in one query
+    rel = models.organization_activity_rel_table
+    result = await session.execute(
+        select(rel.c.organization_id, models.Activity)
+        .join(models.Activity, models.Activity.id == rel.c.activity_id)
+        .where(rel.c.organization_id.in_(organization_ids))
+        .order_by(rel.c.organization_id, models.Activity.id)
+    )
+    activities: dict[int, list[models.Activity]] = defaultdict(list)
+    for organization_id, activity in result:
+        activities[organization_id].append(activity)
+    return activities
+
+
+class RequestLoaders:
+    def __init__(self):
+        self.buildings: Loader[int, models.Building] = Loader(_fetch_buildings)
+        # organization id -> its activities, ordered by id
+        self.organization_activities: Loader[int, list[models.Activity]] = Loader(
+            _fetch_organization_activities, default=list
+        )
+
+
+ORGANIZATION_RELATIONS = ("building", "activities")
+
+
+def relations_of(fieldset: FieldSet | None) -> tuple[str, ...]:
+    return ORGANIZATION_RELATIONS if fieldset is None else fieldset.include
+
+
+def get_loaders(session: AsyncSession) -> RequestLoaders:
+    loaders = session.info.get("loaders")
+    if loaders is None:
+        loaders = session.info["loaders"] = RequestLoaders()
+    return loaders
+
+
+async def load_organization_relations(
+    session: AsyncSession,
+    organizations: Sequence[models.Organization],
+    include: Iterable[str] = ORGANIZATION_RELATIONS,
+) -> None:
+    """
+    Sets the `include` relationships of the organizations: at most one
+    query for the buildings not joined yet and one for the activities.
+    """
+    if not organizations:
+        return
+    loaders = get_loaders(session)
+
+    if "building" in include:
+        # buildings joined by the statement itself only seed the memo
+        pending = []
+        for org in organizations:
+            if "building" in inspect(org).unloaded:
+                pending.append(org)
+            elif org.building is not None:
+                loaders.buildings.prime(org.building.id, org.building)
+        buildings = await loaders.buildings.load_many(
+            session, (org.building_id for org in pending)
+        )
+        for org in pending:
+            set_committed_value(org, "building", buildings[org.building_id])
+
+    if "activities" in include:
+        activities = await loaders.organization_activities.load_many(
+            session, (org.id for org in organizations)
+        )
+        for org in organizations:
+            set_committed_value(org, "activities", list(activities[org.id]))
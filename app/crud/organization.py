@@ -1,177 +1,445 @@
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 
-from sqlalchemy import select, and_
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import (
+    select,
+    and_,
+    func,
+    literal_column,
+    ColumnElement,
+    Float,
+    Row,
+    Select,
+)
+from sqlalchemy.orm import (
+    joinedload,
+    selectinload,
+    contains_eager,
+    with_expression,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import models, schemas
+from app.common.fieldsets import FieldSet
+from app.common.pagination import PageParams
+from app.core.config import settings
+from .pagination import SortKey, fetch_page
 from .utils import (
-    get_child_activities,
-    get_search_rectangle,
-    calculate_distance,
+    resolve_activity_id,
+    activity_subtree_clause,
+    contains_pattern,
+    get_search_rectangles,
+    rectangles_clause,
+    distance_expression,
+    mercator_y,
+    mercator_y_expression,
+    load_options,
+    order_by_ids,
+    in_ids,
+    Rectangle,
+)
+from .spatial_index import building_index
+from .loaders import (
+    load_organization_relations,
+    relations_of,
+    ORGANIZATION_RELATIONS,
+)
+from .geo_cache import (
+    get_building_ids_in_radius,
+    get_building_ids_in_rectangle,
+    get_building_ids_in_polygons,
 )
-from .building import get_buildings_in_rectangle
+
+# the building is joined into the statement, activities are set by the
+# request loaders (app.crud.loaders) after it
+_LOADERS = {
+    "building": joinedload,
+}
+# widenings of the nearest buildings set (k, 4k, 16k buildings) before
+# the nearest organizations query runs over all buildings
+_NEAREST_ROUNDS = 3
+
+
+async def _fetch_page(
+    session: AsyncSession,
+    stmt: Select,
+    keys: list[SortKey],
+    page: PageParams,
+    include: tuple[str, ...],
+) -> tuple[Sequence[models.Organization], str | None]:
+    organizations, next_cursor = await fetch_page(session, stmt, keys, page)
+    await load_organization_relations(session, organizations, include)
+    return organizations, next_cursor
+
+
+async def _in_activity_subtree(
+    session: AsyncSession,
+    activity_id: int,
+) -> ColumnElement[bool]:
+    activity_id = await resolve_activity_id(session, activity_id=activity_id)
+    return activity_subtree_clause(activity_id)
 
 
 async def get_organization(
     session: AsyncSession,
     organization_id: int,
+    fieldset: FieldSet | None = None,
 ) -> models.Organization | None:
     stmt = (
         select(models.Organization)
-        .options(
-            joinedload(models.Organization.building),
-            selectinload(models.Organization.activities),
-        )
+        .options(*load_options(models.Organization, fieldset, _LOADERS))
         .where(models.Organization.id == organization_id)
     )
     result = await session.execute(stmt)
-    return result.scalar_one_or_none()
+    organization = result.scalar_one_or_none()
+    if organization is not None:
+        await load_organization_relations(
+            session, [organization], relations_of(fieldset)
+        )
+    return organization
 
 
 async def get_organizations(
     session: AsyncSession,
-) -> Sequence[models.Organization]:
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Organization], str | None]:
     stmt = select(models.Organization).options(
-        joinedload(models.Organization.building),
-        selectinload(models.Organization.activities),
+        *load_options(models.Organization, fieldset, _LOADERS)
+    )
+    return await _fetch_page(
+        session, stmt, [(models.Organization.id, False)], page, relations_of(fieldset)
     )
-    result = await session.execute(stmt)
-    return result.scalars().all()
 
 
-async def get_organizations_by_activity_id(
+async def get_organizations_by_ids(
     session: AsyncSession,
-    activity_id: int,
-) -> Sequence[models.Organization]:
-    activity_ids = await get_child_activities(session, activity_id=activity_id)
+    ids: Sequence[int],
+) -> tuple[list[models.Organization], list[int]]:
+    stmt = (
+        select(models.Organization)
+        .options(*load_options(models.Organization, None, _LOADERS))
+        .where(models.Organization.id.in_(ids))
+    )
+    organizations = (await session.execute(stmt)).scalars().all()
+    await load_organization_relations(session, organizations)
+    return order_by_ids(organizations, ids)
+
 
+async def stream_organizations(
+    session: AsyncSession,
+    chunk_size: int,
+) -> AsyncIterator[Sequence[models.Organization]]:
     stmt = (
         select(models.Organization)
-        .join(models.Organization.activities)
-        .where(models.Activity.id.in_(activity_ids))
         .options(
             joinedload(models.Organization.building),
             selectinload(models.Organization.activities),
         )
+        .order_by(models.Organization.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream(stmt)
+    async for partition in result.scalars().partitions():
+        yield partition
+        # keep the identity map from growing with the table
+        session.expunge_all()
+
+
+async def get_organizations_by_activity_id(
+    session: AsyncSession,
+    activity_id: int,
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Organization], str | None]:
+    activity_id = await resolve_activity_id(session, activity_id=activity_id)
+
+    stmt = (
+        select(models.Organization)
+        .where(activity_subtree_clause(activity_id))
+        .options(*load_options(models.Organization, fieldset, _LOADERS))
+    )
+    return await _fetch_page(
+        session, stmt, [(models.Organization.id, False)], page, relations_of(fieldset)
     )
-    result = await session.execute(stmt)
-    return result.scalars().unique().all()
 
 
 async def get_organizations_by_activity_name(
     session: AsyncSession,
     activity_name: str,
-) -> Sequence[models.Organization]:
-    activity_ids = await get_child_activities(session, activity_name=activity_name)
+    page: PageParams,
+    fieldset: FieldSet | None = None,
+) -> tuple[Sequence[models.Organization], str | None]:
+    activity_id = await resolve_activity_id(session, activity_name=activity_name)
 
     stmt = (
         select(models.Organization)
-        .join(models.Organization.activities)
-        .where(models.Activity.id.in_(activity_ids))
-        .options(
-            joinedload(models.Organization.building),
-            selectinload(models.Organization.activities),
+        .where(activity_subtree_clause(activity_id))
+        .options(*load_options(models.Organization, fieldset, _LOADERS))
+    )
+    return await _fetch_page(
+        session, stmt, [(models.Organization.id, False)], page, relations_of(fieldset)
+    )
+
+
+async def _in_rectangle(
+    session: AsyncSession,
+    rectangle: Rectangle,
+) -> ColumnElement[bool]:
+    if settings.geo_cache.enabled or settings.geo_index.enabled:
+        return in_ids(
+            models.Organization.building_id,
+            await get_building_ids_in_rectangle(session, rectangle),
         )
+    # a semi-join: the page query itself does not join the buildings
+    return models.Organization.building_id.in_(
+        select(models.Building.id).where(rectangles_clause([rectangle]))
     )
-    result = await session.execute(stmt)
-    return result.scalars().unique().all()
 
 
-async def get_organizations_in_rectangle(
+async def _in_radius(
+    session: AsyncSession,
+    lat: float,
+    lng: float,
+    radius_km: float,
+) -> ColumnElement[bool]:
+    if settings.geo_index.enabled and settings.geo_index.radius_search:
+        return in_ids(
+            models.Organization.building_id,
+            await get_building_ids_in_radius(session, lat, lng, radius_km),
+        )
+
+    # cell id ranges of the bounding boxes prefilter the exact distance check
+    return and_(
+        rectangles_clause(get_search_rectangles(lat, lng, radius_km)),
+        distance_expression(lat, lng) <= radius_km,
+    )
+
+
+async def _in_polygons(
+    session: AsyncSession,
+    polygons: list[list[tuple[float, float]]],
+) -> ColumnElement[bool]:
+    # a city-sized multipolygon holds more buildings than bind parameters
+    return in_ids(
+        models.Organization.building_id,
+        await get_building_ids_in_polygons(session, polygons),
+    )
+
+
+async def get_organization_clusters(
     session: AsyncSession,
     lat_min: float,
     lat_max: float,
     lng_min: float,
     lng_max: float,
-) -> Sequence[models.Organization]:
+    grid_size: int,
+    activity_id: int | None = None,
+) -> Sequence[Row]:
+    """
+    Organizations in the rectangle aggregated into a grid_size x grid_size grid:
+    centroid and count per non-empty cell.
+    Rows are split evenly in Web Mercator y, so the cells are square on the
+    tile. Bounds are half-open (upper bound excluded): a point on a border
+    shared by two tiles or cells is counted once.
+    """
+    y_min = mercator_y(lat_min)
+    y_step = (mercator_y(lat_max) - y_min) / grid_size
+    lng_step = (lng_max - lng_min) / grid_size
+    last_cell = grid_size - 1
+
     stmt = (
-        select(models.Organization)
+        select(
+            func.avg(models.Building.latitude).label("latitude"),
+            func.avg(models.Building.longitude).label("longitude"),
+            func.count(models.Organization.id).label("count"),
+        )
+        .select_from(models.Organization)
         .join(models.Organization.building)
         .where(
-            and_(
-                models.Building.latitude.between(lat_min, lat_max),
-                models.Building.longitude.between(lng_min, lng_max),
-            )
+            rectangles_clause([(lat_min, lat_max, lng_min, lng_max)]),
+            models.Building.latitude < lat_max,
+            models.Building.longitude < lng_max,
         )
-        .options(
-            joinedload(models.Organization.building),
-            selectinload(models.Organization.activities),
+        .group_by(
+            # least() keeps float error at the upper bound in the last cell
+            func.least(
+                func.floor((mercator_y_expression() - y_min) / y_step), last_cell
+            ),
+            func.least(
+                func.floor((models.Building.longitude - lng_min) / lng_step), last_cell
+            ),
         )
     )
+    if activity_id is not None:
+        stmt = stmt.where(await _in_activity_subtree(session, activity_id))
+
     result = await session.execute(stmt)
-    return result.scalars().all()
+    return result.all()
+
+
+async def get_nearest_organizations(
+    session: AsyncSession,
+    lat: float,
+    lng: float,
+    k: int,
+    activity_id: int | None = None,
+) -> Sequence[models.Organization]:
+    distance = distance_expression(lat, lng)
+    stmt = (
+        select(models.Organization)
+        .join(models.Organization.building)
+        .options(
+            contains_eager(models.Organization.building),
+            with_expression(models.Organization.distance, distance),
+        )
+        .order_by(distance, models.Organization.id)
+        .limit(k)
+    )
+
+    if activity_id is not None:
+        stmt = stmt.where(await _in_activity_subtree(session, activity_id))
+
+    if settings.geo_index.enabled:
+        organizations = await _nearest_in_index(session, stmt, lat, lng, k)
+        if organizations is not None:
+            return organizations
+
+    organizations = (await session.execute(stmt)).scalars().all()
+    await load_organization_relations(session, organizations)
+    return organizations
+
+
+async def _nearest_in_index(
+    session: AsyncSession,
+    stmt: Select,
+    lat: float,
+    lng: float,
+    k: int,
+) -> list[models.Organization] | None:
+    """
+    The k nearest organizations of `stmt` in the nearest buildings of the grid
+    index, or None when _NEAREST_ROUNDS widenings find fewer than k (a rare
+    activity) and the statement has to run over all buildings.
+    """
+    await building_index.ensure_fresh(session)
+
+    # organizations outside the n nearest buildings are farther than any inside,
+    # so widen the building set only while it yields fewer than k organizations;
+    # each round queries just the buildings it adds
+    organizations: list[models.Organization] = []
+    queried: set[int] = set()
+    buildings_count = k
+    for _ in range(_NEAREST_ROUNDS):
+        building_ids = building_index.nearest(lat, lng, buildings_count)
+        added = [
+            building_id for building_id in building_ids if building_id not in queried
+        ]
+        queried.update(added)
+        # filtering the joined buildings lets postgres start from their primary key
+        result = await session.execute(stmt.where(in_ids(models.Building.id, added)))
+        organizations += result.scalars().all()
+
+        if len(organizations) >= k or len(building_ids) >= building_index.size:
+            organizations.sort(key=lambda org: (org.distance, org.id))
+            organizations = organizations[:k]
+            await load_organization_relations(session, organizations)
+            return organizations
+        buildings_count *= 4
+    return None
 
 
 async def search_organizations(
     session: AsyncSession,
     search_params: schemas.OrganizationSearchRequest,
-) -> Sequence[models.Organization]:
-    if search_params.name:
-        stmt = (
-            select(models.Organization)
-            .where(models.Organization.name.ilike(f"%{search_params.name}%"))
-            .options(
-                joinedload(models.Organization.building),
-                selectinload(models.Organization.activities),
+) -> tuple[Sequence[models.Organization], str | None]:
+    """
+    All given filters are ANDed into a single statement. The radius filter
+    and the distance are evaluated in it, so only a radius search joins the
+    buildings; rectangles and polygons are resolved to building ids first
+    (cache/index) when enabled. Other buildings are set by the loaders.
+    """
+    params = search_params
+    page = PageParams.from_cursor(params.limit, params.cursor)
+    conditions: list[ColumnElement[bool]] = []
+    sort_keys: list[SortKey] = []
+
+    if params.text:
+        query = func.websearch_to_tsquery("russian", params.text)
+        conditions.append(models.Organization.search_vector.bool_op("@@")(query))
+        if not params.include_activities:
+            # the stored vector also holds activity names; recheck the name alone
+            conditions.append(
+                func.to_tsvector("russian", models.Organization.name).bool_op("@@")(
+                    query
+                )
+            )
+        rank_args = [models.Organization.search_vector, query]
+        if not params.include_activities:
+            # weights {D, C, B, A}: only the name (A) counts, not activity names (B)
+            rank_args.insert(0, literal_column("'{0,0,0,1}'::float4[]"))
+        sort_keys.append((func.ts_rank_cd(*rank_args, type_=Float), True))
+
+    if params.name and params.name_match == "similarity":
+        # the % operator uses ix_organizations_name_trgm with this threshold
+        await session.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.similarity_threshold",
+                    str(params.similarity_threshold),
+                    True,
+                )
             )
         )
-        result = await session.execute(stmt)
-        return result.scalars().all()
+        conditions.append(models.Organization.name.op("%")(params.name))
+        sort_keys.append(
+            (func.similarity(models.Organization.name, params.name, type_=Float), True)
+        )
+    elif params.name:
+        conditions.append(
+            models.Organization.name.ilike(contains_pattern(params.name), escape="\\")
+        )
 
-    elif activity_name := search_params.activity_name:
-        return await get_organizations_by_activity_name(
-            session, activity_name=activity_name
+    if params.activity_name:
+        activity_id = await resolve_activity_id(
+            session, activity_name=params.activity_name
         )
+        conditions.append(activity_subtree_clause(activity_id))
 
-    elif all([search_params.lat, search_params.lng, search_params.radius]):
-        lat = search_params.lat
-        lng = search_params.lng
-        radius = search_params.radius
+    if params.phone:
+        # served by ix_organizations_phones (GIN)
+        conditions.append(models.Organization.phones.contains([params.phone]))
 
-        lat_min, lat_max, lng_min, lng_max = get_search_rectangle(lat, lng, radius)
-        buildings_in_rectangle = await get_buildings_in_rectangle(
-            session, lat_min, lat_max, lng_min, lng_max
+    distance = None
+    if params.radius is not None:
+        if params.lat is None or params.lng is None:
+            raise ValueError("Для поиска по радиусу нужно указать lat, lng и radius")
+        distance = distance_expression(params.lat, params.lng)
+        conditions.append(
+            await _in_radius(session, params.lat, params.lng, params.radius)
         )
+        if params.sort_by_distance:
+            sort_keys.insert(0, (distance, False))
 
-        building_ids = [
-            b.id
-            for b in buildings_in_rectangle
-            if calculate_distance(lat, lng, b.latitude, b.longitude) <= radius
-        ]
-        stmt = (
-            select(models.Organization)
-            .where(models.Organization.building_id.in_(building_ids))
-            .options(
-                joinedload(models.Organization.building),
-                selectinload(models.Organization.activities),
-            )
-        )
-        result = await session.execute(stmt)
-        return result.scalars().all()
+    elif params.polygons:
+        conditions.append(await _in_polygons(session, params.polygons))
 
     elif any(
-        [
-            search_params.min_lat,
-            search_params.max_lat,
-            search_params.min_lng,
-            search_params.max_lng,
-        ]
+        v is not None
+        for v in (params.min_lat, params.max_lat, params.min_lng, params.max_lng)
     ):
-        lat_min = search_params.min_lat
-        lat_max = search_params.max_lat
-        lng_min = search_params.min_lng
-        lng_max = search_params.max_lng
-
-        if not all([lat_min, lat_max, lng_min, lng_max]):
+        rectangle = (params.min_lat, params.max_lat, params.min_lng, params.max_lng)
+        if None in rectangle:
             raise ValueError("Для прямоугольного поиска нужно указать все 4 границы")
+        conditions.append(await _in_rectangle(session, rectangle))
 
-        return await get_organizations_in_rectangle(
-            session,
-            search_params.min_lat,
-            search_params.max_lat,
-            search_params.min_lng,
-            search_params.max_lng,
-        )
+    if not conditions:
+        raise ValueError("Не указаны параметры поиска")
 
-    raise ValueError("Не указаны параметры поиска")
+    stmt = select(models.Organization).where(*conditions)
+    if distance is not None:
+        stmt = stmt.join(models.Organization.building).options(
+            contains_eager(models.Organization.building),
+            with_expression(models.Organization.distance, distance),
+        )
+    sort_keys.append((models.Organization.id, False))
+    return await _fetch_page(session, stmt, sort_keys, page, ORGANIZATION_RELATIONS)
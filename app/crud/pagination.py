@@ -0,0 +1,115 @@
+from decimal import Decimal
+from typing import Any, Sequence
+
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    or_,
+    tuple_,
+    ColumnElement,
+    BigInteger,
+    Integer,
+    SmallInteger,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.pagination import InvalidCursor, PageParams, encode_cursor
+
+# sort expression and whether it is descending; the last key must be unique
+SortKey = tuple[ColumnElement, bool]
+
+
+def keyset_clause(keys: list[SortKey], values: list[Any]) -> ColumnElement[bool]:
+    """
+    Rows strictly after `values` in the order given by `keys`.
+    """
+    if not any(descending for _, descending in keys):
+        # a row comparison lets postgres seek a composite index directly
+        return tuple_(*(expr for expr, _ in keys)) > tuple_(*values)
+
+    clauses = []
+    for i, (expr, descending) in enumerate(keys):
+        equal_prefix = [prev == value for (prev, _), value in zip(keys, values[:i])]
+        clauses.append(
+            and_(*equal_prefix, expr < values[i] if descending else expr > values[i])
+        )
+    return or_(*clauses)
+
+
+# absolute bounds of the integer column types, beyond them asyncpg fails binding
+_INTEGER_LIMITS = ((SmallInteger, 2**15), (BigInteger, 2**63), (Integer, 2**31))
+
+
+def _is_valid_value(expr: ColumnElement, value: Any) -> bool:
+    # bool is an int subclass, but never a sort key value
+    if value is None or isinstance(value, bool):
+        return False
+
+    try:
+        python_type = expr.type.python_type
+    except NotImplementedError:
+        raise TypeError(f"Sort key {expr} has no SQL type, pass type_ to it")
+
+    if python_type in (float, Decimal):
+        return isinstance(value, (int, float))
+    if python_type is int:
+        if not isinstance(value, int):
+            return False
+        for type_, limit in _INTEGER_LIMITS:
+            if isinstance(expr.type, type_):
+                return -limit <= value < limit
+    return isinstance(value, python_type)
+
+
+def check_cursor_values(keys: list[SortKey], values: list[Any]) -> None:
+    """
+    Cursor values must match the sort keys in number and type, so that
+    a crafted cursor fails as a bad request and not in the driver.
+    """
+    if len(values) != len(keys) or not all(
+        _is_valid_value(expr, value) for (expr, _), value in zip(keys, values)
+    ):
+        raise InvalidCursor("Invalid cursor")
+
+
+async def fetch_rows_page(
+    session: AsyncSession,
+    stmt: Select,
+    keys: list[SortKey],
+    page: PageParams,
+) -> tuple[Sequence[Row], str | None]:
+    """
+    One page of the rows of `stmt`, ordered by `keys`, and the cursor
+    of the next page (None on the last one). The sort key values are
+    appended to the end of each row.
+    """
+    if page.after is not None:
+        check_cursor_values(keys, page.after)
+        stmt = stmt.where(keyset_clause(keys, page.after))
+
+    stmt = (
+        stmt.add_columns(*(expr for expr, _ in keys))
+        .order_by(*(expr.desc() if descending else expr for expr, descending in keys))
+        .limit(page.limit + 1)
+    )
+    rows = (await session.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        next_cursor = encode_cursor(rows[-1][-len(keys) :])
+    return rows, next_cursor
+
+
+async def fetch_page(
+    session: AsyncSession,
+    stmt: Select,
+    keys: list[SortKey],
+    page: PageParams,
+) -> tuple[Sequence[Any], str | None]:
+    """
+    One page of the entities selected by `stmt`, see fetch_rows_page.
+    """
+    rows, next_cursor = await fetch_rows_page(session, stmt, keys, page)
+    return [row[0] for row in rows], next_cursor
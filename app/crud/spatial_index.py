@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from .data_versions import data_versions
+from .utils import (
+    EARTH_RADIUS_KM,
+    Rectangle,
+    get_search_rectangles,
+    filter_by_radius,
+    filter_by_rectangle,
+)
+
+_logger = logging.getLogger(__name__)
+
+Cell = tuple[int, int]
+# building ids, latitudes, longitudes
+CellPoints = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+class BuildingGridIndex:
+    """
+    Uniform lat/lng grid over building coordinates kept in process memory.
+    Answers "building ids within R km of (lat, lng)" without querying the DB.
+    Rebuilt when the `buildings` table version changes or after
+    `refresh_interval` seconds.
+    """
+
+    def __init__(self, cell_size: float, refresh_interval: float):
+        self.cell_size = cell_size
+        self.refresh_interval = refresh_interval
+        self._cells: dict[Cell, CellPoints] = {}
+        self._size = 0
+        self._built_at: float | None = None
+        self._version = -1
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, version: int) -> bool:
+        return (
+            self._built_at is not None
+            and self._version == version
+            and time.monotonic() - self._built_at < self.refresh_interval
+        )
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return math.floor(lat / self.cell_size), math.floor(lng / self.cell_size)
+
+    async def build(self, session: AsyncSession, version: int) -> None:
+        stmt = select(
+            models.Building.id,
+            models.Building.latitude,
+            models.Building.longitude,
+        )
+        result = await session.execute(stmt)
+
+        cells: dict[Cell, list[tuple[int, float, float]]] = defaultdict(list)
+        count = 0
+        for building_id, lat, lng in result:
+            cells[self._cell(lat, lng)].append((building_id, lat, lng))
+            count += 1
+
+        self._cells = {
+            cell: (
+                np.array([p[0] for p in points], dtype=np.int64),
+                np.array([p[1] for p in points], dtype=np.float64),
+                np.array([p[2] for p in points], dtype=np.float64),
+            )
+            for cell, points in cells.items()
+        }
+        self._size = count
+        self._version = version
+        self._built_at = time.monotonic()
+        _logger.info(
+            f"Building grid index built: {count} buildings in {len(cells)} cells."
+        )
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        table_version = await data_versions.version(session, "buildings")
+        version = table_version.version
+        if self._is_fresh(version):
+            return
+
+        async with self._lock:
+            # another request may have rebuilt the index while we were waiting
+            if not self._is_fresh(version):
+                await self.build(session, version)
+
+    def _chunks(
+        self, lat_min: float, lat_max: float, lng_min: float, lng_max: float
+    ) -> list[CellPoints]:
+        i_min, j_min = self._cell(lat_min, lng_min)
+        i_max, j_max = self._cell(lat_max, lng_max)
+
+        # a wide box may span more cells than are occupied
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(self._cells):
+            return [
+                points
+                for (i, j), points in self._cells.items()
+                if i_min <= i <= i_max and j_min <= j <= j_max
+            ]
+
+        return [
+            self._cells[(i, j)]
+            for i in range(i_min, i_max + 1)
+            for j in range(j_min, j_max + 1)
+            if (i, j) in self._cells
+        ]
+
+    def _candidates(self, rectangles: list[Rectangle]) -> CellPoints:
+        chunks = [
+            chunk for rectangle in rectangles for chunk in self._chunks(*rectangle)
+        ]
+        if not chunks:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64),
+                np.empty(0, dtype=np.float64),
+            )
+
+        ids, latitudes, longitudes = zip(*chunks)
+        return (
+            np.concatenate(ids),
+            np.concatenate(latitudes),
+            np.concatenate(longitudes),
+        )
+
+    def _within_radius(
+        self, lat: float, lng: float, radius_km: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        ids, latitudes, longitudes = self._candidates(
+            get_search_rectangles(lat, lng, radius_km)
+        )
+        distances, mask = filter_by_radius(lat, lng, latitudes, longitudes, radius_km)
+        return ids[mask], distances[mask]
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> list[int]:
+        ids, _ = self._within_radius(lat, lng, radius_km)
+        return ids.tolist()
+
+    def points_within_radius(
+        self, lat: float, lng: float, radius_km: float
+    ) -> CellPoints:
+        ids, latitudes, longitudes = self._candidates(
+            get_search_rectangles(lat, lng, radius_km)
+        )
+        _, mask = filter_by_radius(lat, lng, latitudes, longitudes, radius_km)
+        return ids[mask], latitudes[mask], longitudes[mask]
+
+    def points_in_rectangle(self, rectangle: Rectangle) -> CellPoints:
+        ids, latitudes, longitudes = self._candidates([rectangle])
+        mask = filter_by_rectangle(latitudes, longitudes, rectangle)
+        return ids[mask], latitudes[mask], longitudes[mask]
+
+    def nearest(self, lat: float, lng: float, count: int) -> list[int]:
+        """
+        Ids of up to `count` buildings closest to (lat, lng), nearest first.
+        """
+        count = min(count, self._size)
+        if count == 0:
+            return []
+
+        # grow the search circle until it holds enough buildings
+        radius_km = self.cell_size * KM_PER_DEGREE
+        while True:
+            ids, distances = self._within_radius(lat, lng, radius_km)
+            if len(ids) >= count or radius_km >= HALF_CIRCUMFERENCE_KM:
+                break
+            radius_km *= 2
+
+        order = np.argsort(distances, kind="stable")[:count]
+        return ids[order].tolist()
+
+
+building_index = BuildingGridIndex(
+    cell_size=settings.geo_index.cell_size,
+    refresh_interval=settings.geo_index.refresh_interval,
+)
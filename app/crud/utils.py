@@ -1,99 +1,208 @@
 import math
 import logging
+from typing import Any, Callable, Iterable, Sequence, TypeVar
+
+import numpy as np
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, any_, bindparam, func, ColumnElement, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import load_only, raiseload
+from sqlalchemy.orm.interfaces import ORMOption
 
 from app import models
+from app.common.fieldsets import FieldSet
+from app.common.geocell import cell_ranges
+from .activity_tree import activity_tree
 
 _logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
-async def get_child_activities(
+async def resolve_activity_id(
     session: AsyncSession,
     *,
     activity_id: int = None,
     activity_name: str = None,
-) -> list[int]:
+) -> int:
+    """
+    Checks the activity id or finds the activity by name
+    in the in-memory activity tree snapshot.
+    """
     if activity_id is None and activity_name is None:
         raise ValueError("Either activity_id or activity_name must be provided")
 
-    stmt = select(models.Activity).options(selectinload(models.Activity.children))
+    snapshot = await activity_tree.get(session)
 
     if activity_id is not None:
-        stmt = stmt.where(models.Activity.id == activity_id)
+        found_id = activity_id if activity_id in snapshot else None
     else:
-        stmt = stmt.where(models.Activity.name.ilike(f"%{activity_name}%"))
-
-    result = await session.execute(stmt)
-    activity = result.scalar_one_or_none()
+        found_id = snapshot.find_by_name(activity_name)
 
-    if activity is None:
+    if found_id is None:
         _logger.warning(f"Activity not found: id={activity_id}, name={activity_name}")
         raise ValueError("Activity not found")
 
-    children_ids = [child.id for child in activity.children]
+    return found_id
 
-    # deepest level of activity
-    if len(children_ids) == 0:
-        return [activity.id]
 
-    # current activity in level 2, so children in level 3
-    if activity.parent_id:
-        return children_ids
-
-    # the current level is 1, grandchildren might exist
-    return await get_grandchildren_activities(session, children_ids)
+def activity_subtree_clause(activity_id: int) -> ColumnElement[bool]:
+    """
+    Organization has an activity in the subtree of `activity_id`, at any depth.
+    """
+    rel = models.organization_activity_rel_table
+    closure = models.activity_closure_table
+    return models.Organization.id.in_(
+        select(rel.c.organization_id)
+        .join(closure, closure.c.descendant_id == rel.c.activity_id)
+        .where(closure.c.ancestor_id == activity_id)
+    )
 
 
-async def get_grandchildren_activities(
-    session: AsyncSession,
-    children_ids: list[int],
-) -> list[int]:
-    stmt = (
-        select(models.Activity)
-        .where(models.Activity.id.in_(children_ids))
-        .options(selectinload(models.Activity.children))
-    )
+def load_options(
+    model: type[models.Base],
+    fieldset: FieldSet | None,
+    loaders: dict[str, Callable[[Any], ORMOption]],
+) -> list[ORMOption]:
+    """
+    Loader options selecting only the columns and relationships of `fieldset`.
+    Without a fieldset every relationship in `loaders` is eager loaded.
+    Relationships missing from `loaders` are set by the caller after the query
+    (see app.crud.loaders).
+    """
+    if fieldset is None:
+        return [loader(getattr(model, name)) for name, loader in loaders.items()]
 
-    result = await session.execute(stmt)
-    activities = result.scalars().all()
+    return [
+        load_only(*(getattr(model, name) for name in fieldset.fields)),
+        *(
+            loaders[name](getattr(model, name))
+            for name in fieldset.include
+            if name in loaders
+        ),
+        # nothing else is serialized, an unexpected lazy load is a bug
+        raiseload("*"),
+    ]
 
-    activity_ids = []
-    for activity in activities:
-        if len(activity.children) == 0:
-            activity_ids.append(activity.id)
-        else:
-            activity_ids.extend([c.id for c in activity.children])
 
-    return activity_ids
+def contains_pattern(value: str) -> str:
+    """
+    ILIKE pattern matching `value` as a literal substring.
+    """
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
 
 
 # Earth's radius in kilometers
 EARTH_RADIUS_KM = 6371.0
 
 
-def get_search_rectangle(
-    lat: float, lng: float, radius_km: float
-) -> tuple[float, float, float, float]:
+Rectangle = tuple[float, float, float, float]
+
+
+def get_search_rectangles(lat: float, lng: float, radius_km: float) -> list[Rectangle]:
+    """
+    Bounding boxes (lat_min, lat_max, lng_min, lng_max) of a search circle.
+    A circle covering a pole spans all longitudes, a circle crossing
+    the antimeridian is split into two boxes.
+    """
+    angular_radius = radius_km / EARTH_RADIUS_KM
     lat_rad = math.radians(lat)
-    lng_rad = math.radians(lng)
 
-    # Calculate the latitude and longitude bounds
-    lat_min = lat_rad - (radius_km / EARTH_RADIUS_KM)
-    lat_max = lat_rad + (radius_km / EARTH_RADIUS_KM)
-    lng_min = lng_rad - (radius_km / (EARTH_RADIUS_KM * math.cos(lat_rad)))
-    lng_max = lng_rad + (radius_km / (EARTH_RADIUS_KM * math.cos(lat_rad)))
+    lat_min = math.degrees(lat_rad - angular_radius)
+    lat_max = math.degrees(lat_rad + angular_radius)
 
-    return (
-        math.degrees(lat_min),
-        math.degrees(lat_max),
-        math.degrees(lng_min),
-        math.degrees(lng_max),
+    if lat_min <= -90 or lat_max >= 90:
+        return [(max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0)]
+
+    # longitude half-width at the widest point of the circle
+    dlng = math.degrees(math.asin(math.sin(angular_radius) / math.cos(lat_rad)))
+    lng_min = lng - dlng
+    lng_max = lng + dlng
+
+    if lng_min < -180:
+        return [
+            (lat_min, lat_max, lng_min + 360, 180.0),
+            (lat_min, lat_max, -180.0, lng_max),
+        ]
+    if lng_max > 180:
+        return [
+            (lat_min, lat_max, lng_min, 180.0),
+            (lat_min, lat_max, -180.0, lng_max - 360),
+        ]
+    return [(lat_min, lat_max, lng_min, lng_max)]
+
+
+def get_tile_rectangle(z: int, x: int, y: int) -> Rectangle:
+    """
+    Bounds (lat_min, lat_max, lng_min, lng_max) of a Web Mercator z/x/y tile.
+    """
+    tiles = 2**z
+    lng_min = x / tiles * 360 - 180
+    lng_max = (x + 1) / tiles * 360 - 180
+    lat_max = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / tiles))))
+    lat_min = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / tiles))))
+
+    return lat_min, lat_max, lng_min, lng_max
+
+
+def mercator_y(lat: float) -> float:
+    """
+    Web Mercator y of the latitude, in radians of the projected sphere.
+    """
+    return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+
+def mercator_y_expression() -> ColumnElement[float]:
+    # mercator_y of the building latitude, evaluated in SQL
+    return func.ln(func.tan(math.pi / 4 + func.radians(models.Building.latitude) / 2.0))
+
+
+def rectangles_clause(rectangles: list[Rectangle]) -> ColumnElement[bool]:
+    # cell id ranges turn each rectangle into a few scans of ix_buildings_cell_id,
+    # the lat/lng bounds then drop points of cells crossing the rectangle border
+    return or_(
+        *[
+            and_(
+                or_(
+                    *[
+                        models.Building.cell_id.between(start, end)
+                        for start, end in cell_ranges(
+                            lat_min, lat_max, lng_min, lng_max
+                        )
+                    ]
+                ),
+                models.Building.latitude.between(lat_min, lat_max),
+                models.Building.longitude.between(lng_min, lng_max),
+            )
+            for lat_min, lat_max, lng_min, lng_max in rectangles
+        ]
     )
 
 
+def in_ids(column: ColumnElement[int], ids: Iterable[int]) -> ColumnElement[bool]:
+    """
+    `column = ANY(:ids)` with the ids bound as a single array parameter.
+    An expanding IN binds a parameter per id, asyncpg accepts at most 32767.
+    """
+    return column == any_(bindparam(None, list(ids), type_=ARRAY(Integer)))
+
+
+def distance_expression(lat: float, lng: float) -> ColumnElement[float]:
+    """
+    Haversine distance in km from (lat, lng) to the building, evaluated in SQL.
+    """
+    dlat = func.radians(models.Building.latitude - lat)
+    dlng = func.radians(models.Building.longitude - lng)
+
+    a = func.power(func.sin(dlat / 2.0), 2) + math.cos(math.radians(lat)) * func.cos(
+        func.radians(models.Building.latitude)
+    ) * func.power(func.sin(dlng / 2.0), 2)
+
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     dlat = math.radians(lat2 - lat1)
     dlon = math.radians(lng2 - lng1)
@@ -107,3 +216,93 @@ def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     c = 2 * math.asin(math.sqrt(a))
 
     return EARTH_RADIUS_KM * c
+
+
+def calculate_distances(
+    lat: float,
+    lng: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized haversine: distances in km from (lat, lng) to every point.
+    """
+    lat_rad = math.radians(lat)
+    latitudes_rad = np.radians(latitudes)
+
+    dlat = latitudes_rad - lat_rad
+    dlon = np.radians(longitudes) - math.radians(lng)
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + math.cos(lat_rad) * np.cos(latitudes_rad) * np.sin(dlon / 2) ** 2
+    )
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    return EARTH_RADIUS_KM * c
+
+
+def filter_by_radius(
+    lat: float,
+    lng: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    radius_km: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns distances to every point and a boolean mask of points within radius.
+    """
+    distances = calculate_distances(lat, lng, latitudes, longitudes)
+    return distances, distances <= radius_km
+
+
+def filter_by_rectangle(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    rectangle: Rectangle,
+) -> np.ndarray:
+    """
+    Returns a boolean mask of points inside the rectangle.
+    """
+    lat_min, lat_max, lng_min, lng_max = rectangle
+    return (
+        (latitudes >= lat_min)
+        & (latitudes <= lat_max)
+        & (longitudes >= lng_min)
+        & (longitudes <= lng_max)
+    )
+
+
+def filter_by_polygon(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    polygon: list[tuple[float, float]],
+) -> np.ndarray:
+    """
+    Returns a boolean mask of points inside the (lat, lng) polygon.
+    Ray casting, vectorized over points: one array pass per polygon edge.
+    """
+    inside = np.zeros(len(latitudes), dtype=bool)
+    for (lat1, lng1), (lat2, lng2) in zip(polygon, polygon[1:] + polygon[:1]):
+        crosses = (lat1 > latitudes) != (lat2 > latitudes)
+        # horizontal edges never cross, their division result is masked out
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lng_at = lng1 + (latitudes - lat1) * (lng2 - lng1) / (lat2 - lat1)
+        inside ^= crosses & (longitudes < lng_at)
+    return inside
+
+
+def get_polygon_rectangle(polygon: list[tuple[float, float]]) -> Rectangle:
+    latitudes = [lat for lat, _ in polygon]
+    longitudes = [lng for _, lng in polygon]
+    return min(latitudes), max(latitudes), min(longitudes), max(longitudes)
+
+
+def order_by_ids(items: Iterable[T], ids: Sequence[int]) -> tuple[list[T], list[int]]:
+    """
+    Items with an `id` in the order of `ids` and the ids without an item.
+    """
+    by_id = {item.id: item for item in items}
+    found = [by_id[item_id] for item_id in ids if item_id in by_id]
+    missing = [item_id for item_id in ids if item_id not in by_id]
+    return found, missing
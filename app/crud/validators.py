@@ -0,0 +1,71 @@
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.common.conditional import Validators, make_etag
+from .data_versions import data_versions
+
+
+async def get_table_validators(
+    session: AsyncSession,
+    resource: str,
+) -> Validators:
+    """
+    Validators of a representation built from the tracked tables:
+    `resource` (path and query) and the current table versions.
+    """
+    versions = await data_versions.get(session)
+    etag = make_etag(
+        resource,
+        *(f"{table}@{v.version}" for table, v in sorted(versions.items())),
+    )
+    last_modified = max(
+        (v.updated_at for v in versions.values() if v.updated_at is not None),
+        default=None,
+    )
+    return Validators(etag=etag, last_modified=last_modified)
+
+
+async def get_organization_validators(
+    session: AsyncSession,
+    organization_id: int,
+    representation: str = "full",
+) -> Validators | None:
+    """
+    Validators of one organization with its building and activities from the
+    row versions. Linking or unlinking an activity rewrites the organization's
+    search_vector, which bumps its version as well. `representation` tells
+    apart the bodies built from the same rows (sparse fieldsets).
+    """
+    rel = models.organization_activity_rel_table
+    stmt = (
+        select(
+            models.Organization.version,
+            models.Building.version,
+            func.coalesce(func.sum(models.Activity.version), 0),
+            func.greatest(
+                models.Organization.updated_at,
+                models.Building.updated_at,
+                func.max(models.Activity.updated_at),
+            ),
+        )
+        .join(models.Building, models.Building.id == models.Organization.building_id)
+        .outerjoin(rel, rel.c.organization_id == models.Organization.id)
+        .outerjoin(models.Activity, models.Activity.id == rel.c.activity_id)
+        .where(models.Organization.id == organization_id)
+        .group_by(models.Organization.id, models.Building.id)
+    )
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+
+    organization_version, building_version, activities_version, last_modified = row
+    etag = make_etag(
+        "organization",
+        organization_id,
+        representation,
+        organization_version,
+        building_version,
+        activities_version,
+    )
+    return Validators(etag=etag, last_modified=last_modified)
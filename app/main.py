@@ -8,6 +8,7 @@ from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.api_v1.routers import main_router
 from app.models.db_helper import db_helper
+from app.crud import building_index
 from app.common.dependencies import AuthorizationRequired
 
 from .utils import seed_test_data
@@ -23,6 +24,9 @@ async def lifespan(app: FastAPI):
     # startup
     logging.info("Starting application...")
     await seed_test_data(db_helper.session_factory)
+    if settings.geo_index.enabled:
+        async with db_helper.session_factory() as session:
+            await building_index.ensure_fresh(session)
 
     yield
 
@@ -5,6 +5,8 @@ __all__ = (
     "Building",
     "Organization",
     "organization_activity_rel_table",
+    "activity_closure_table",
+    "data_versions_table",
 )
 
 from .base import Base
@@ -13,3 +15,5 @@ from .activity import Activity
 from .building import Building
 from .organization import Organization
 from .organization_activity_rel import organization_activity_rel_table
+from .activity_closure import activity_closure_table
+from .data_version import data_versions_table
@@ -1,16 +1,19 @@
 from typing import TYPE_CHECKING
-from sqlalchemy import Integer, ForeignKey, CheckConstraint
+from sqlalchemy import Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 from .mixins.int_id_pk import IntIdPkMixin
+from .mixins.row_version import RowVersionMixin
 from .organization_activity_rel import organization_activity_rel_table
 
 if TYPE_CHECKING:
     from .organization import Organization
 
 
-class Activity(IntIdPkMixin, Base):
+class Activity(IntIdPkMixin, RowVersionMixin, Base):
+    # activity_closure is maintained by the trg_activities_closure_* triggers,
+    # which also reject moving an activity into its own subtree
     __tablename__ = "activities"
 
     name: Mapped[str] = mapped_column(index=True)
@@ -23,14 +26,19 @@ class Activity(IntIdPkMixin, Base):
         "Activity", back_populates="children", remote_side="Activity.id"
     )
     children: Mapped[list["Activity"]] = relationship(
-        "Activity", back_populates="parent"
+        "Activity", back_populates="parent", order_by="Activity.id"
     )
     organizations: Mapped[list["Organization"]] = relationship(
         secondary=organization_activity_rel_table, back_populates="activities"
     )
 
     __table_args__ = (
-        CheckConstraint('level <=3', name='level_check'),
+        Index(
+            "ix_activities_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,24 @@
+from sqlalchemy import ForeignKey, Table, Column, Integer
+
+from .base import Base
+
+
+# every (ancestor, descendant) pair of the activity tree, including (id, id, 0)
+activity_closure_table = Table(
+    "activity_closure",
+    Base.metadata,
+    Column(
+        "ancestor_id",
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "descendant_id",
+        Integer,
+        ForeignKey("activities.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+    Column("depth", Integer, nullable=False),
+)
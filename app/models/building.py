@@ -1,21 +1,32 @@
 from typing import TYPE_CHECKING
+from sqlalchemy import BigInteger, FetchedValue
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 from .mixins.int_id_pk import IntIdPkMixin
+from .mixins.row_version import RowVersionMixin
 
 if TYPE_CHECKING:
     from .organization import Organization
 
 
-class Building(IntIdPkMixin, Base):
+class Building(IntIdPkMixin, RowVersionMixin, Base):
     address: Mapped[str]
     latitude: Mapped[float] = mapped_column(index=True)
     longitude: Mapped[float] = mapped_column(index=True)
+    # Z-order cell of (latitude, longitude), see app.common.geocell;
+    # set by the trg_buildings_cell_id trigger on insert and coordinate updates
+    cell_id: Mapped[int] = mapped_column(
+        BigInteger,
+        index=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+    )
 
     organizations: Mapped[list["Organization"]] = relationship(
         "Organization",
         back_populates="building",
+        order_by="Organization.id",
     )
 
     def __repr__(self) -> str:
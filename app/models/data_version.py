@@ -0,0 +1,18 @@
+from sqlalchemy import Table, Column, String, BigInteger, DateTime, func
+
+from .base import Base
+
+
+# per-table change counters, bumped by statement-level triggers (see alembic)
+data_versions_table = Table(
+    "data_versions",
+    Base.metadata,
+    Column("table_name", String, primary_key=True),
+    Column("version", BigInteger, nullable=False, server_default="0"),
+    Column(
+        "updated_at",
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    ),
+)
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+
+
+class RowVersionMixin:
+    # maintained by the bump_row_version() trigger on every changing update
+    version: Mapped[int] = mapped_column(BigInteger, server_default="1")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
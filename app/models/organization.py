@@ -1,10 +1,11 @@
 from typing import TYPE_CHECKING
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship, query_expression
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 
 from .base import Base
 from .mixins.int_id_pk import IntIdPkMixin
+from .mixins.row_version import RowVersionMixin
 from .organization_activity_rel import organization_activity_rel_table
 
 if TYPE_CHECKING:
@@ -12,16 +13,42 @@ if TYPE_CHECKING:
     from .activity import Activity
 
 
-class Organization(IntIdPkMixin, Base):
+class Organization(IntIdPkMixin, RowVersionMixin, Base):
     name: Mapped[str] = mapped_column(index=True)
     phones: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=True, default=[])
-    building_id: Mapped[int] = mapped_column(ForeignKey("buildings.id"))
+    building_id: Mapped[int] = mapped_column(ForeignKey("buildings.id"), index=True)
+    # name (weight A) and activity names (weight B), maintained by DB triggers
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
 
     building: Mapped["Building"] = relationship(back_populates="organizations")
+    # nested lists are ordered by id, the fast read path relies on it
     activities: Mapped[list["Activity"]] = relationship(
         secondary=organization_activity_rel_table,
         back_populates="organizations",
+        order_by="Activity.id",
+    )
+
+    # distance to the search point in km, loaded only by radius search
+    distance: Mapped[float | None] = query_expression()
+
+    __table_args__ = (
+        # serves ILIKE '%...%' and pg_trgm similarity (%) searches by name
+        Index(
+            "ix_organizations_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # serves phones @> ARRAY[...] in the search phone filter
+        Index("ix_organizations_phones", "phones", postgresql_using="gin"),
+        Index(
+            "ix_organizations_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
     )
 
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__} id:{self.id} ({self.name!r})"
\ No newline at end of file
+        return f"{self.__class__.__name__} id:{self.id} ({self.name!r})"
@@ -9,5 +9,11 @@ organization_activity_rel_table = Table(
     Column(
         "organization_id", Integer, ForeignKey("organizations.id"), primary_key=True
     ),
-    Column("activity_id", Integer, ForeignKey("activities.id"), primary_key=True),
+    Column(
+        "activity_id",
+        Integer,
+        ForeignKey("activities.id"),
+        primary_key=True,
+        index=True,
+    ),
 )
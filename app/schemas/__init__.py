@@ -2,6 +2,7 @@ from .activity import (
     ActivityCreate,
     ActivityRead,
     ActivityReadFull,
+    ActivityTreeNode,
 )
 
 from .building import (
@@ -15,8 +16,22 @@ from .building_organization import (
     BuildingOrganizationsRead,
     OrganizationBuildingRead,
     OrganizationReadFull,
+    OrganizationSearchResult,
 )
 
 from .search import (
     OrganizationSearchRequest,
 )
+
+from .cluster import (
+    OrganizationCluster,
+    TileClusters,
+)
+
+from .service import (
+    CacheStatsRead,
+)
+
+from .pagination import Page
+
+from .batch import BatchRequest, BatchRead
@@ -28,3 +28,10 @@ class ActivityReadFull(ActivityBase):
     level: int
     parent: "ActivityRead | None"
     children: list["ActivityRead"]
+
+
+class ActivityTreeNode(BaseModel):
+    id: int
+    name: str
+    level: int
+    children: list["ActivityTreeNode"] = []
@@ -0,0 +1,28 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+T = TypeVar("T")
+
+
+class BatchRequest(BaseModel):
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={"examples": [{"ids": [3, 1, 2]}]},
+    )
+
+    ids: list[int] = Field(
+        min_length=1, max_length=500, description="Список ID (не более 500)"
+    )
+
+    @field_validator("ids")
+    @classmethod
+    def drop_duplicates(cls, v: list[int]) -> list[int]:
+        # the first occurrence keeps its position
+        return list(dict.fromkeys(v))
+
+
+class BatchRead(BaseModel, Generic[T]):
+    items: list[T] = Field(description="Найденные объекты в порядке запроса")
+    missing: list[int] = Field(description="ID, для которых объекты не найдены")
@@ -31,3 +31,7 @@ class OrganizationReadFull(OrganizationBase):
     id: int
     building: "BuildingRead"
     activities: list["ActivityRead"]
+
+
+class OrganizationSearchResult(OrganizationReadFull):
+    distance: float | None = None
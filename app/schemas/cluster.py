@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class OrganizationCluster(BaseModel):
+    model_config = ConfigDict(
+        from_attributes=True,
+    )
+
+    latitude: float
+    longitude: float
+    count: int
+
+
+class TileClusters(BaseModel):
+    z: int
+    x: int
+    y: int
+    clusters: list[OrganizationCluster]
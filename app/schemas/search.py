@@ -1,6 +1,17 @@
+from typing import Annotated, Literal
+
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from pydantic_core import PydanticCustomError
 
+from app.core.config import settings
+
+
+Latitude = Annotated[float, Field(ge=-90, le=90)]
+Longitude = Annotated[float, Field(ge=-180, le=180)]
+Polygon = Annotated[
+    list[tuple[Latitude, Longitude]], Field(min_length=3, max_length=1000)
+]
+
 
 class OrganizationSearchRequest(BaseModel):
     model_config = ConfigDict(
@@ -9,17 +20,58 @@ class OrganizationSearchRequest(BaseModel):
             "examples": [
                 {"min_lat": 55.0, "max_lat": 59.0, "min_lng": 37.6, "max_lng": 37.62},
                 {"activity_name": "Еда"},
+                {"name": "Рога и копыта", "name_match": "similarity"},
+                {"text": "молочная продукция", "include_activities": True},
+                {
+                    "activity_name": "Еда",
+                    "lat": 55.75,
+                    "lng": 37.61,
+                    "radius": 2,
+                    "sort_by_distance": True,
+                },
+                {"polygons": [[[55.7, 37.5], [55.8, 37.6], [55.7, 37.7]]]},
             ]
         },
     )
 
     name: str | None = Field(None, description="Название организации")
+    name_match: Literal["substring", "similarity"] = Field(
+        "substring",
+        description="Поиск по названию: вхождение подстроки или похожесть (триграммы)",
+    )
+    similarity_threshold: float = Field(
+        0.3, gt=0, le=1, description="Минимальная похожесть названия (0..1)"
+    )
+    text: str | None = Field(
+        None,
+        min_length=1,
+        description="Полнотекстовый поиск по названию (русская морфология)",
+    )
+    include_activities: bool = Field(
+        True,
+        description="Искать слова из text также в названиях видов деятельности",
+    )
+    limit: int = Field(
+        settings.pagination.default_limit,
+        ge=1,
+        le=settings.pagination.max_limit,
+        description="Размер страницы результатов",
+    )
+    cursor: str | None = Field(
+        None, description="Курсор следующей страницы (next_cursor предыдущего ответа)"
+    )
     activity_name: str | None = Field(None, description="Название деятельности")
+    phone: str | None = Field(
+        None, min_length=1, description="Телефон (точное совпадение)"
+    )
 
     # search in certain radius
     lat: float | None = Field(None, ge=-90, le=90, description="Широта")
     lng: float | None = Field(None, ge=-180, le=180, description="Долгота")
     radius: float | None = Field(None, gt=0, description="Радиус поиска в км")
+    sort_by_distance: bool = Field(
+        False, description="Сортировать результаты поиска по радиусу по расстоянию"
+    )
 
     # search in the rectangle sector
     min_lat: float | None = Field(None, ge=-90, le=90, description="Минимальная широта")
@@ -33,37 +85,38 @@ class OrganizationSearchRequest(BaseModel):
         None, ge=-180, le=180, description="Максимальная долгота"
     )
 
+    # search in the polygons (multipolygon)
+    polygons: list[Polygon] | None = Field(
+        None,
+        min_length=1,
+        max_length=50,
+        description="Многоугольники, каждый - список вершин [широта, долгота]",
+    )
+
     @model_validator(mode="after")
     def validate_filters(self) -> "OrganizationSearchRequest":
         """
         Валидация совместимости различных фильтров.
+        Фильтры объединяются по И, допускается только одна геообласть.
         """
-        name = self.name
-        activity_name = self.activity_name
         radius_fields = (self.lat, self.lng, self.radius)
         rect_fields = (self.min_lat, self.max_lat, self.min_lng, self.max_lng)
-
-        if name and any([activity_name, *radius_fields, *rect_fields]):
-            raise PydanticCustomError(
-                "name_filter_conflict",
-                "Используйте поиск либо по имени организации, либо по имени деятельности, либо по координатам по раздельности",
-            )
-
-        if activity_name and any([*radius_fields, *rect_fields]):
-            raise PydanticCustomError(
-                "activity_name_filter_conflict",
-                "Используйте поиск либо по имени деятельности, либо по координатам по раздельности",
-            )
-
-        # Проверка на одновременное использование радиуса и прямоугольника
-        if any(radius_fields) and any(rect_fields):
+        # coordinates may legitimately be 0, so check for None explicitly
+        has_radius = any(v is not None for v in radius_fields)
+        has_rect = any(v is not None for v in rect_fields)
+        has_polygons = self.polygons is not None
+
+        # name, text, activity and phone filters combine with each other
+        # and with one geo filter; the results are intersected
+        # Проверка на одновременное использование радиуса, прямоугольника и многоугольников
+        if sum([has_radius, has_rect, has_polygons]) > 1:
             raise PydanticCustomError(
                 "geo_filter_conflict",
-                "Используйте либо радиус (lat+lng+radius), либо прямоугольник (min/max lat/lng), но не оба метода одновременно",
+                "Используйте только один способ поиска по области: радиус (lat+lng+radius), прямоугольник (min/max lat/lng) или многоугольники (polygons)",
             )
 
         # Проверка полноты параметров для радиуса
-        if any(radius_fields) and not all(radius_fields):
+        if has_radius and None in radius_fields:
             missing = [
                 name
                 for name, val in zip(["lat", "lng", "radius"], radius_fields)
@@ -74,9 +127,15 @@ class OrganizationSearchRequest(BaseModel):
                 f"Для поиска по радиусу необходимо указать все параметры: lat, lng и radius. Отсутствуют: {', '.join(missing)}",
             )
 
+        if self.sort_by_distance and not has_radius:
+            raise PydanticCustomError(
+                "sort_by_distance_without_radius",
+                "Сортировка по расстоянию доступна только при поиске по радиусу",
+            )
+
         # Проверка полноты параметров для прямоугольника
-        if any(rect_fields):
-            if not all(rect_fields):
+        if has_rect:
+            if None in rect_fields:
                 missing = [
                     name
                     for name, val in zip(
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class CacheStatsRead(BaseModel):
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
@@ -0,0 +1,59 @@
+"""
+Scalar vs vectorized haversine radius filter.
+
+Usage: python -m benchmarks.haversine
+"""
+
+import time
+
+import numpy as np
+
+from app.crud.utils import calculate_distance, filter_by_radius
+
+
+CENTER = (55.75, 37.62)
+RADIUS_KM = 10.0
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+def scalar_filter(latitudes: list[float], longitudes: list[float]) -> list[int]:
+    return [
+        i
+        for i, (lat, lng) in enumerate(zip(latitudes, longitudes))
+        if calculate_distance(*CENTER, lat, lng) <= RADIUS_KM
+    ]
+
+
+def vectorized_filter(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    _, mask = filter_by_radius(*CENTER, latitudes, longitudes, RADIUS_KM)
+    return np.flatnonzero(mask)
+
+
+def timed(func, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    rng = np.random.default_rng(42)
+    print(f"{'points':>10} {'scalar, ms':>12} {'vectorized, ms':>15} {'speedup':>8}")
+
+    for size in SIZES:
+        latitudes = rng.uniform(CENTER[0] - 0.5, CENTER[0] + 0.5, size)
+        longitudes = rng.uniform(CENTER[1] - 0.5, CENTER[1] + 0.5, size)
+
+        scalar_time, scalar_ids = timed(
+            scalar_filter, latitudes.tolist(), longitudes.tolist()
+        )
+        vector_time, vector_ids = timed(vectorized_filter, latitudes, longitudes)
+        assert scalar_ids == vector_ids.tolist()
+
+        print(
+            f"{size:>10} {scalar_time * 1000:>12.1f} {vector_time * 1000:>15.1f} "
+            f"{scalar_time / vector_time:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Deterministic synthetic dataset of a realistic shape: buildings clustered
+around a few cities, a three-level activity taxonomy and organizations with
+generated brand names, phones and one to three activities each.
+"""
+
+import random
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+BUILDINGS = 5_000
+ORGANIZATIONS = 50_000
+ROOT_ACTIVITIES = 8
+CHILDREN_PER_ACTIVITY = (6, 5)
+# rows per INSERT, within the 32767 bind parameters of asyncpg
+CHUNK_SIZE = 5_000
+
+# (latitude, longitude) of the cities the buildings are spread around
+CITIES = (
+    ("Москва", 55.7558, 37.6173),
+    ("Санкт-Петербург", 59.9386, 30.3141),
+    ("Новосибирск", 55.0302, 82.9204),
+    ("Екатеринбург", 56.8389, 60.6057),
+)
+STREETS = ("Ленина", "Мира", "Садовая", "Лесная", "Школьная", "Набережная")
+ACTIVITY_NAMES = (
+    "Еда",
+    "Автомобили",
+    "Строительство",
+    "Одежда",
+    "Медицина",
+    "Образование",
+    "Финансы",
+    "Туризм",
+)
+ORGANIZATION_WORDS = (
+    "Рога",
+    "Копыта",
+    "Молоко",
+    "Хлеб",
+    "Мясной",
+    "Двор",
+    "Север",
+    "Техно",
+    "Строй",
+    "Сервис",
+    "Альянс",
+    "Вектор",
+)
+LEGAL_FORMS = ("ООО", "ИП", "АО")
+# brand names are made of these, so most names are (nearly) unique like in
+# a real directory and the trigram/text indexes see realistic selectivity
+SYLLABLES = (
+    "ба",
+    "ве",
+    "ги",
+    "до",
+    "ка",
+    "ле",
+    "ми",
+    "но",
+    "па",
+    "ро",
+    "си",
+    "ту",
+    "фа",
+    "ха",
+    "че",
+    "ша",
+    "зо",
+    "ры",
+    "лю",
+    "та",
+)
+
+
+def _buildings(rng: random.Random) -> list[dict]:
+    buildings = []
+    for building_id in range(1, BUILDINGS + 1):
+        city, lat, lng = rng.choice(CITIES)
+        buildings.append(
+            {
+                "id": building_id,
+                "address": f"г. {city}, ул. {rng.choice(STREETS)}, "
+                f"д. {rng.randint(1, 200)}",
+                "latitude": round(rng.gauss(lat, 0.15), 6),
+                "longitude": round(rng.gauss(lng, 0.25), 6),
+            }
+        )
+    return buildings
+
+
+def _activity_levels() -> list[list[dict]]:
+    levels = [
+        [
+            {"id": i + 1, "name": name, "parent_id": None, "level": 1}
+            for i, name in enumerate(ACTIVITY_NAMES[:ROOT_ACTIVITIES])
+        ]
+    ]
+    next_id = len(levels[0]) + 1
+    for level, children in enumerate(CHILDREN_PER_ACTIVITY, start=2):
+        rows = []
+        for parent in levels[-1]:
+            for i in range(1, children + 1):
+                rows.append(
+                    {
+                        "id": next_id,
+                        "name": f"{parent['name']} {i}",
+                        "parent_id": parent["id"],
+                        "level": level,
+                    }
+                )
+                next_id += 1
+        levels.append(rows)
+    return levels
+
+
+def _organizations(
+    rng: random.Random, activity_ids: list[int]
+) -> tuple[list[dict], list[dict]]:
+    organizations, links = [], []
+    for organization_id in range(1, ORGANIZATIONS + 1):
+        brand = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        words = f"{brand} {rng.choice(ORGANIZATION_WORDS)}"
+        organizations.append(
+            {
+                "id": organization_id,
+                "name": f'{rng.choice(LEGAL_FORMS)} "{words}"',
+                "phones": [
+                    f"8-9{rng.randint(10, 99)}-{rng.randint(100, 999)}-"
+                    f"{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+                    for _ in range(rng.randint(0, 3))
+                ],
+                "building_id": rng.randint(1, BUILDINGS),
+            }
+        )
+        for activity_id in sorted(rng.sample(activity_ids, rng.randint(1, 3))):
+            links.append(
+                {"organization_id": organization_id, "activity_id": activity_id}
+            )
+    return organizations, links
+
+
+async def _insert(session: AsyncSession, table, rows: list[dict]) -> None:
+    # one multi-row VALUES statement per chunk: executemany would run a
+    # statement, and fire the data version triggers, for every row
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await session.execute(insert(table).values(rows[start : start + CHUNK_SIZE]))
+
+
+async def seed_dataset(session: AsyncSession, seed: int = 42) -> None:
+    """
+    Loads the dataset through Core inserts; cell ids, the activity closure
+    and search vectors are filled by the database triggers.
+    """
+    rng = random.Random(seed)
+
+    await _insert(session, models.Building.__table__, _buildings(rng))
+
+    activity_ids = []
+    # parents first, the closure trigger looks up the ancestors of the parent
+    for rows in _activity_levels():
+        await _insert(session, models.Activity.__table__, rows)
+        activity_ids += [row["id"] for row in rows]
+
+    organizations, links = _organizations(rng, activity_ids)
+    await _insert(session, models.Organization.__table__, organizations)
+
+    # one backfill instead of a search vector update per link
+    await session.execute(
+        text(
+            "ALTER TABLE organization_activity_rel "
+            "DISABLE TRIGGER trg_organization_activity_rel_search_vector"
+        )
+    )
+    await _insert(session, models.organization_activity_rel_table, links)
+    await session.execute(
+        text(
+            "ALTER TABLE organization_activity_rel "
+            "ENABLE TRIGGER trg_organization_activity_rel_search_vector"
+        )
+    )
+    await session.execute(
+        text(
+            "UPDATE organizations "
+            "SET search_vector = organization_search_vector(name, id)"
+        )
+    )
+
+    # explicit ids were inserted, move the sequences past them
+    for table_name in ("buildings", "activities", "organizations"):
+        await session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                f"(SELECT max(id) FROM {table_name}))"
+            )
+        )
+
+    await session.commit()
+
+    # the search_vector update left dead rows and the GIN pending lists
+    # full, which autovacuum would clear up in a long-lived database
+    connection = await session.connection(
+        execution_options={"isolation_level": "AUTOCOMMIT"}
+    )
+    await connection.execute(text("VACUUM ANALYZE"))
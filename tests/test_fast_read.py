@@ -0,0 +1,176 @@
+"""
+The fast read path (app.crud.fast_read) must produce the same bytes as the
+ORM path rendered through the response schemas, as FastAPI does it.
+"""
+
+from typing import Any
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+from app import crud, models, schemas
+from app.common.pagination import PageParams
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+PAGE_SIZE = 50
+
+
+def render(schema: Any, content: Any) -> bytes:
+    # response_model validation and ORJSONResponse rendering
+    adapter = TypeAdapter(schema)
+    value = adapter.validate_python(content, from_attributes=True)
+    return orjson.dumps(adapter.dump_python(value, mode="json"))
+
+
+def page(items, next_cursor) -> dict:
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def batch(items, missing) -> dict:
+    return {"items": items, "missing": missing}
+
+
+@pytest.fixture(params=[False, True], ids=["records", "json_in_database"])
+def json_in_database(request, monkeypatch) -> bool:
+    monkeypatch.setattr(settings.fast_read, "json_in_database", request.param)
+    return request.param
+
+
+def assert_same(fast: bytes, expected: bytes, json_in_database: bool) -> None:
+    if json_in_database:
+        # PostgreSQL formats JSON with spaces, compare the documents
+        assert orjson.loads(fast) == orjson.loads(expected)
+    else:
+        assert fast == expected
+
+
+async def pages(session, fetch, count: int = 2) -> list[PageParams]:
+    """
+    Params of the first `count` pages of `fetch`.
+    """
+    params = [PageParams(limit=PAGE_SIZE)]
+    for _ in range(count - 1):
+        _, next_cursor = await fetch(session, params[-1])
+        params.append(PageParams.from_cursor(PAGE_SIZE, next_cursor))
+    return params
+
+
+async def test_organization(session, other_session, json_in_database):
+    organization_id = await session.scalar(select(models.Organization.id).limit(1))
+
+    fast = await crud.get_organization_json(session, organization_id)
+    organization = await crud.get_organization(other_session, organization_id)
+
+    assert_same(
+        fast,
+        render(schemas.OrganizationReadFull, organization),
+        json_in_database,
+    )
+
+
+async def test_organization_missing(session):
+    assert await crud.get_organization_json(session, -1) is None
+
+
+async def test_organizations(session, other_session, json_in_database):
+    for params in await pages(other_session, crud.get_organizations):
+        fast = await crud.get_organizations_json(session, params)
+        expected = page(*await crud.get_organizations(other_session, params))
+
+        assert_same(
+            fast,
+            render(schemas.Page[schemas.OrganizationReadFull], expected),
+            json_in_database,
+        )
+
+
+async def test_organizations_in_building(session, other_session, json_in_database):
+    # the building with the most organizations, so the page is full
+    building_id = await session.scalar(
+        select(models.Organization.building_id)
+        .group_by(models.Organization.building_id)
+        .order_by(func.count().desc(), models.Organization.building_id)
+        .limit(1)
+    )
+    params = PageParams(limit=PAGE_SIZE)
+
+    fast = await crud.get_organizations_in_building_json(session, building_id, params)
+    expected = page(
+        *await crud.get_organizations_in_building(other_session, building_id, params)
+    )
+
+    assert_same(
+        fast,
+        render(schemas.Page[schemas.OrganizationReadFull], expected),
+        json_in_database,
+    )
+
+
+async def test_organizations_by_activity(session, other_session, json_in_database):
+    activity_id = await session.scalar(
+        select(models.Activity.id).where(models.Activity.level == 2).limit(1)
+    )
+    params = PageParams(limit=PAGE_SIZE)
+
+    fast = await crud.get_organizations_by_activity_id_json(
+        session, activity_id, params
+    )
+    expected = page(
+        *await crud.get_organizations_by_activity_id(other_session, activity_id, params)
+    )
+
+    assert_same(
+        fast,
+        render(schemas.Page[schemas.OrganizationReadFull], expected),
+        json_in_database,
+    )
+
+
+async def test_organizations_batch(session, other_session, json_in_database):
+    ids = [7, 3, -1, 42]
+
+    fast = await crud.get_organizations_by_ids_json(session, ids)
+    expected = batch(*await crud.get_organizations_by_ids(other_session, ids))
+
+    assert_same(
+        fast,
+        render(schemas.BatchRead[schemas.OrganizationReadFull], expected),
+        json_in_database,
+    )
+
+
+async def test_buildings(session, other_session, json_in_database):
+    for params in await pages(other_session, crud.list_buildings):
+        fast = await crud.list_buildings_json(session, params)
+        expected = page(*await crud.list_buildings(other_session, params))
+
+        assert_same(
+            fast,
+            render(schemas.Page[schemas.BuildingOrganizationsRead], expected),
+            json_in_database,
+        )
+
+
+async def test_buildings_batch(session, other_session, json_in_database):
+    ids = [5, 1, -1, 4000]
+
+    fast = await crud.get_buildings_by_ids_json(session, ids)
+    expected = batch(*await crud.get_buildings_by_ids(other_session, ids))
+
+    assert_same(
+        fast,
+        render(schemas.BatchRead[schemas.BuildingOrganizationsRead], expected),
+        json_in_database,
+    )
+
+
+async def test_activities(session, other_session):
+    for params in await pages(other_session, crud.list_activities):
+        fast = await crud.list_activities_json(session, params)
+        expected = page(*await crud.list_activities(other_session, params))
+
+        assert fast == render(schemas.Page[schemas.ActivityReadFull], expected)
@@ -0,0 +1,132 @@
+"""
+Geo filters of the organization search on the seeded dataset.
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.crud import organization
+from app.crud.geo_cache import geo_cache
+from app.crud.utils import filter_by_polygon, in_ids
+
+from .dataset import ORGANIZATIONS
+
+pytestmark = pytest.mark.anyio
+
+# more ids than asyncpg accepts bind parameters in one statement (32767)
+MANY_IDS = list(range(1, 40_001))
+
+
+async def test_in_ids_binds_one_parameter(session):
+    count = await session.scalar(
+        select(func.count())
+        .select_from(models.Organization)
+        .where(in_ids(models.Organization.building_id, MANY_IDS))
+    )
+
+    assert count == ORGANIZATIONS
+
+
+async def test_search_with_many_candidate_buildings(session, monkeypatch):
+    async def candidates(session, rectangle):
+        return MANY_IDS
+
+    monkeypatch.setattr(organization, "get_building_ids_in_rectangle", candidates)
+    params = schemas.OrganizationSearchRequest(
+        min_lat=-90, max_lat=90, min_lng=-180, max_lng=180, limit=50
+    )
+
+    organizations, next_cursor = await crud.search_organizations(session, params)
+
+    assert [org.id for org in organizations] == list(range(1, 51))
+    assert next_cursor is not None
+
+
+async def radius_search(session) -> list[tuple[int, float]]:
+    params = schemas.OrganizationSearchRequest(
+        lat=55.7558, lng=37.6173, radius=2, sort_by_distance=True, limit=100
+    )
+    organizations, _ = await crud.search_organizations(session, params)
+    return [(org.id, round(org.distance, 9)) for org in organizations]
+
+
+async def test_radius_search_in_sql_matches_index(session, other_session, monkeypatch):
+    in_sql = await radius_search(session)
+
+    monkeypatch.setattr(settings.geo_index, "radius_search", True)
+    in_index = await radius_search(other_session)
+
+    assert in_sql
+    assert in_sql == in_index
+
+
+@pytest.mark.parametrize("k, level", [(10, None), (100, 3)])
+async def test_nearest_in_index_matches_sql(
+    session, other_session, monkeypatch, k, level
+):
+    activity_id = None
+    if level is not None:
+        activity_id = await session.scalar(
+            select(models.Activity.id).where(models.Activity.level == level).limit(1)
+        )
+
+    in_index = await crud.get_nearest_organizations(
+        session, 55.7558, 37.6173, k, activity_id=activity_id
+    )
+    monkeypatch.setattr(settings.geo_index, "enabled", False)
+    in_sql = await crud.get_nearest_organizations(
+        other_session, 55.7558, 37.6173, k, activity_id=activity_id
+    )
+
+    assert len(in_index) == k
+    assert [org.id for org in in_index] == [org.id for org in in_sql]
+
+
+async def test_rectangle_search_hits_geo_cache(session, other_session):
+    # default settings: the cache sits in front of the grid index
+    params = schemas.OrganizationSearchRequest(
+        min_lat=55.74, max_lat=55.77, min_lng=37.59, max_lng=37.64
+    )
+    geo_cache.clear()
+
+    first, _ = await crud.search_organizations(session, params)
+    hits = geo_cache.stats.hits
+    second, _ = await crud.search_organizations(other_session, params)
+
+    assert geo_cache.stats.hits == hits + 1
+    assert first
+    assert [org.id for org in first] == [org.id for org in second]
+
+
+async def test_polygon_search_matches_point_in_polygon(session, other_session):
+    polygon = [(55.5, 37.3), (56.0, 37.6), (55.7, 38.0), (55.5, 37.8)]
+    buildings = (
+        await session.execute(
+            select(
+                models.Building.id, models.Building.latitude, models.Building.longitude
+            )
+        )
+    ).all()
+    inside = filter_by_polygon(
+        np.array([b.latitude for b in buildings]),
+        np.array([b.longitude for b in buildings]),
+        polygon,
+    )
+    building_ids = [b.id for b, is_inside in zip(buildings, inside) if is_inside]
+    expected = (
+        await session.scalars(
+            select(models.Organization.id)
+            .where(models.Organization.building_id.in_(building_ids))
+            .order_by(models.Organization.id)
+            .limit(100)
+        )
+    ).all()
+
+    params = schemas.OrganizationSearchRequest(polygons=[polygon], limit=100)
+    organizations, _ = await crud.search_organizations(other_session, params)
+
+    assert len(building_ids) > 100
+    assert [org.id for org in organizations] == expected
@@ -0,0 +1,50 @@
+"""
+Cursor errors are bad requests on every paginated endpoint.
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app import crud, models
+from app.api_v1.endpoints import activity
+from app.common.pagination import (
+    InvalidCursor,
+    PageParams,
+    decode_cursor,
+    encode_cursor,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("cursor", ["!!", encode_cursor([]), "bnVsbA=="])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+async def activity_id(session) -> int:
+    return await session.scalar(select(models.Activity.id).limit(1))
+
+
+@pytest.mark.parametrize("values", [["x"], [1, 2], [2**40]])
+async def test_tampered_cursor(session, activity_id, values):
+    page = PageParams.from_cursor(10, encode_cursor(values))
+
+    with pytest.raises(InvalidCursor):
+        await crud.get_organizations_by_activity_id(session, activity_id, page)
+
+
+async def test_activity_organizations_tampered_cursor_is_bad_request(
+    session, activity_id
+):
+    page = PageParams.from_cursor(10, encode_cursor(["x"]))
+
+    with pytest.raises(HTTPException) as error:
+        await activity.get_organizations_by_activity_id(
+            activity_id, page, None, session
+        )
+
+    assert error.value.status_code == 400
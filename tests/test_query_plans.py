@@ -0,0 +1,260 @@
+"""
+Query plans of the crud functions on the seeded dataset: every statement a
+function sends is explained with its parameters. The test fails on a
+sequential scan of a large table, or when a statement's total cost grows
+past the recorded baseline (tests/query_plan_costs.json) by more than
+COST_TOLERANCE.
+
+Record the baseline after an intended plan change:
+    pytest tests/test_query_plans.py --update-plan-costs
+
+Functions that read whole tables by design are not covered: stream_*, the
+building grid index and the activity tree snapshot. They are loaded before
+the statements are captured.
+"""
+
+import hashlib
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+from app.common.pagination import PageParams
+from app.crud.utils import get_tile_rectangle
+from app.models import db_helper
+
+pytestmark = pytest.mark.anyio
+
+BASELINE_PATH = Path(__file__).parent / "query_plan_costs.json"
+COST_TOLERANCE = 1.5
+LARGE_TABLES = {"organizations", "buildings", "organization_activity_rel"}
+PAGE = PageParams(limit=50)
+
+# Moscow center and a few kilometres around it
+LAT, LNG = 55.7558, 37.6173
+RECTANGLE = (55.74, 55.77, 37.59, 37.64)
+POLYGON = [(55.74, 37.59), (55.77, 37.615), (55.74, 37.64)]
+# the z=12 tile over the center
+TILE = (12, 2476, 1280)
+
+
+@contextmanager
+def captured_statements():
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    engine = db_helper.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+async def explain(session: AsyncSession, statement: str, parameters: Any) -> dict:
+    # the session's connection, so transaction-local settings still apply
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    plan = await raw.driver_connection.fetchval(
+        f"EXPLAIN (FORMAT JSON) {statement}", *(parameters or ())
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def statement_key(statement: str) -> str:
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+class Samples:
+    """
+    Ids and values of the seeded dataset used as arguments.
+    """
+
+    organization_id: int
+    # the quoted part of its name and the brand word in it
+    name: str
+    brand: str
+    building_id: int
+    activity_id: int
+    activity_name: str
+    phone: str
+
+
+@pytest.fixture(scope="session")
+async def samples(database) -> Samples:
+    samples = Samples()
+    async with db_helper.session_factory() as session:
+        samples.organization_id = 1
+        name = await session.scalar(
+            select(models.Organization.name).where(models.Organization.id == 1)
+        )
+        samples.name = name.split('"')[1]
+        samples.brand = samples.name.split()[0]
+        samples.building_id = await session.scalar(
+            select(models.Organization.building_id)
+            .group_by(models.Organization.building_id)
+            .order_by(func.count().desc(), models.Organization.building_id)
+            .limit(1)
+        )
+        activity = (
+            await session.execute(
+                select(models.Activity.id, models.Activity.name)
+                .where(models.Activity.level == 3)
+                .order_by(models.Activity.id)
+                .limit(1)
+            )
+        ).one()
+        samples.activity_id, samples.activity_name = activity
+        samples.phone = await session.scalar(
+            select(models.Organization.phones[1])
+            .where(func.cardinality(models.Organization.phones) > 0)
+            .order_by(models.Organization.id)
+            .limit(1)
+        )
+    return samples
+
+
+@pytest.fixture(scope="session")
+def plan_costs(request):
+    update = request.config.getoption("--update-plan-costs")
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    recorded: dict[str, dict[str, float]] = {}
+
+    yield baseline, recorded
+
+    if update:
+        baseline.update(recorded)
+        BASELINE_PATH.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+        )
+
+
+def search(**params) -> Callable[[AsyncSession, Samples], Awaitable]:
+    async def run(session, samples):
+        values = {k: v(samples) if callable(v) else v for k, v in params.items()}
+        return await crud.search_organizations(
+            session, schemas.OrganizationSearchRequest(**values)
+        )
+
+    return run
+
+
+CASES: dict[str, Callable[[AsyncSession, Samples], Awaitable]] = {
+    "get_organization": lambda s, x: crud.get_organization(s, x.organization_id),
+    "get_organizations": lambda s, x: crud.get_organizations(s, PAGE),
+    "get_organizations_by_ids": lambda s, x: crud.get_organizations_by_ids(
+        s, [7, 3, 42, 49_000]
+    ),
+    "get_organizations_by_activity_id": (
+        lambda s, x: crud.get_organizations_by_activity_id(s, x.activity_id, PAGE)
+    ),
+    "get_organizations_by_activity_name": (
+        lambda s, x: crud.get_organizations_by_activity_name(s, x.activity_name, PAGE)
+    ),
+    "get_organizations_in_building": (
+        lambda s, x: crud.get_organizations_in_building(s, x.building_id, PAGE)
+    ),
+    "get_nearest_organizations": lambda s, x: crud.get_nearest_organizations(
+        s, LAT, LNG, 10
+    ),
+    "get_nearest_organizations_by_activity": (
+        lambda s, x: crud.get_nearest_organizations(
+            s, LAT, LNG, 10, activity_id=x.activity_id
+        )
+    ),
+    "get_organization_clusters": lambda s, x: crud.get_organization_clusters(
+        s, *get_tile_rectangle(*TILE), grid_size=8
+    ),
+    "search_text": search(text=lambda x: x.brand),
+    "search_text_names_only": search(text=lambda x: x.brand, include_activities=False),
+    "search_name_substring": search(name=lambda x: x.brand),
+    "search_name_similarity": search(name=lambda x: x.name, name_match="similarity"),
+    "search_phone": search(phone=lambda x: x.phone),
+    "search_activity_name": search(activity_name=lambda x: x.activity_name),
+    "search_radius": search(lat=LAT, lng=LNG, radius=1, sort_by_distance=True),
+    "search_rectangle": search(
+        min_lat=RECTANGLE[0],
+        max_lat=RECTANGLE[1],
+        min_lng=RECTANGLE[2],
+        max_lng=RECTANGLE[3],
+    ),
+    "search_polygons": search(polygons=[POLYGON]),
+    "list_buildings": lambda s, x: crud.list_buildings(s, PAGE),
+    "get_buildings_by_ids": lambda s, x: crud.get_buildings_by_ids(s, [5, 1, 4_000]),
+    "building_exists": lambda s, x: crud.building_exists(s, x.building_id),
+    "list_activities": lambda s, x: crud.list_activities(s, PAGE),
+    # get_table_validators reads the versions through this, at most once
+    # per check_interval
+    "data_versions": lambda s, x: crud.data_versions.load(s),
+    "get_organization_validators": lambda s, x: crud.get_organization_validators(
+        s, x.organization_id
+    ),
+    "get_organization_json": lambda s, x: crud.get_organization_json(
+        s, x.organization_id
+    ),
+    "get_organizations_json": lambda s, x: crud.get_organizations_json(s, PAGE),
+    "get_organizations_by_ids_json": lambda s, x: crud.get_organizations_by_ids_json(
+        s, [7, 3, 42, 49_000]
+    ),
+    "get_organizations_in_building_json": (
+        lambda s, x: crud.get_organizations_in_building_json(s, x.building_id, PAGE)
+    ),
+    "get_organizations_by_activity_id_json": (
+        lambda s, x: crud.get_organizations_by_activity_id_json(s, x.activity_id, PAGE)
+    ),
+    "list_buildings_json": lambda s, x: crud.list_buildings_json(s, PAGE),
+    "get_buildings_by_ids_json": lambda s, x: crud.get_buildings_by_ids_json(
+        s, [5, 1, 4_000]
+    ),
+    "list_activities_json": lambda s, x: crud.list_activities_json(s, PAGE),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+async def test_query_plan(case, session, samples, plan_costs):
+    baseline, recorded = plan_costs
+    # whole-table in-memory snapshots, refreshed outside of the measured calls
+    await crud.building_index.ensure_fresh(session)
+    await crud.activity_tree.get(session)
+
+    with captured_statements() as statements:
+        await CASES[case](session, samples)
+    assert statements, "no statements captured"
+
+    costs: dict[str, float] = {}
+    regressions = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        plan = await explain(session, statement, parameters)
+
+        for node in plan_nodes(plan):
+            assert not (
+                node["Node Type"] == "Seq Scan"
+                and node.get("Relation Name") in LARGE_TABLES
+            ), f"Seq Scan on {node['Relation Name']}:\n{statement}"
+
+        key = statement_key(statement)
+        cost = costs[key] = plan["Total Cost"]
+        expected = baseline.get(case, {}).get(key)
+        if expected is not None and cost > expected * COST_TOLERANCE:
+            regressions.append(f"{cost:.1f} > {expected:.1f}:\n{statement}")
+
+    recorded[case] = costs
+    assert not regressions, "plan cost regressions:\n" + "\n\n".join(regressions)
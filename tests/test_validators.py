@@ -0,0 +1,31 @@
+"""
+Validators of the organization representations.
+"""
+
+import pytest
+
+from app import crud
+from app.api_v1.fieldsets import organization_fieldset
+
+pytestmark = pytest.mark.anyio
+
+
+async def etag(session, fields=None, include=None) -> str:
+    fieldset = organization_fieldset(fields=fields, include=include)
+    representation = "full" if fieldset is None else fieldset.key
+    validators = await crud.get_organization_validators(session, 1, representation)
+    return validators.etag
+
+
+async def test_organization_etag_per_representation(session):
+    full = await etag(session)
+    names = await etag(session, fields="name")
+    with_building = await etag(session, fields="name", include="building")
+
+    assert len({full, names, with_building}) == 3
+
+
+async def test_organization_etag_of_normalized_fieldset(session):
+    # id is always returned and repeats are dropped: the same representation
+    assert await etag(session, fields="name") == await etag(session, fields="id,name")
+    assert await etag(session, fields="name,name") == await etag(session, fields="name")